@@ -1,32 +1,121 @@
-from flask import Flask, request, jsonify, session
+from flask import Flask, request, jsonify, session, send_file
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from flask_mail import Mail, Message
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.utils import secure_filename
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timedelta, timezone
 import pytz
-from celery import Celery
+from celery import Celery, chord
 from celery.schedules import crontab
+from celery.signals import beat_init
 import redis
+import base64
 import csv
+import smtplib
+import sqlite3
+import gzip
 import io
 import json
 import os
+import time
+import threading
 import logging
+from collections import OrderedDict
+from itertools import groupby
+import shutil
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet exports are optional
+    pa = pq = None
 
 app = Flask(__name__)
 app.secret_key = "your-secret-key-here"
 
 # CORS configuration
-CORS(app, supports_credentials=True, origins=["http://localhost:8080"])
+CORS(
+    app,
+    supports_credentials=True,
+    origins=["http://localhost:8080"],
+    expose_headers=["X-Total-Count", "X-Page", "X-Per-Page", "X-Next-Cursor"]
+)
 
 # Database configuration
 basedir = os.path.abspath(os.path.dirname(__file__))
-app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(basedir, 'parking.db')}"
+# DATABASE_URL picks the engine (default: the SQLite file next to this module).
+# SQLite connections get the SQLITE_* pragmas below (WAL so readers never
+# block the writer, and a busy timeout so writers queue instead of failing
+# with "database is locked"); PostgreSQL gets an explicitly sized pool.
+app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get(
+    "DATABASE_URL", f"sqlite:///{os.path.join(basedir, 'parking.db')}"
+).replace("postgres://", "postgresql://", 1)
+# DELETE gives back the rollback journal, e.g. to compare in benchmarks/write_concurrency.py
+app.config["SQLITE_JOURNAL_MODE"] = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+app.config["SQLITE_BUSY_TIMEOUT_MS"] = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+app.config["SQLITE_SYNCHRONOUS"] = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")  # safe with WAL
+app.config["SQLITE_CACHE_SIZE_KB"] = int(os.environ.get("SQLITE_CACHE_SIZE_KB", 20000))
+app.config["DB_POOL_SIZE"] = int(os.environ.get("DB_POOL_SIZE", 10))
+app.config["DB_MAX_OVERFLOW"] = int(os.environ.get("DB_MAX_OVERFLOW", 20))
+app.config["DB_POOL_TIMEOUT"] = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+app.config["DB_POOL_RECYCLE"] = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+
+def database_engine_options(config):
+    """SQLAlchemy engine options for the configured database"""
+    if config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+        # Pragmas are applied per connection by configure_sqlite_connection
+        return {'connect_args': {'timeout': config["SQLITE_BUSY_TIMEOUT_MS"] / 1000}}
+    return {
+        'pool_size': config["DB_POOL_SIZE"],
+        'max_overflow': config["DB_MAX_OVERFLOW"],
+        'pool_timeout': config["DB_POOL_TIMEOUT"],
+        'pool_recycle': config["DB_POOL_RECYCLE"],
+        'pool_pre_ping': True,
+    }
+
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = database_engine_options(app.config)
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
 # Redis configuration
 app.config["REDIS_URL"] = "redis://localhost:6379/0"
+# Refresh-ahead: mutations ask a Celery worker to rebuild shared cache keys in
+# place instead of deleting them (needs a running worker to take effect)
+app.config["CACHE_REFRESH_AHEAD"] = os.environ.get("CACHE_REFRESH_AHEAD", "0") == "1"
+# Keys invalidated within this many seconds are refreshed together by one task
+app.config["CACHE_REFRESH_WINDOW"] = float(os.environ.get("CACHE_REFRESH_WINDOW", 2))
+# Short timeouts so a stalled Redis costs a request milliseconds, not seconds;
+# after REDIS_BREAKER_THRESHOLD consecutive failures Redis is skipped entirely
+# for REDIS_BREAKER_COOLDOWN seconds and reads fall back to the database
+app.config["REDIS_MAX_CONNECTIONS"] = 50
+app.config["REDIS_SOCKET_TIMEOUT"] = 0.25
+app.config["REDIS_BREAKER_THRESHOLD"] = 3
+app.config["REDIS_BREAKER_COOLDOWN"] = 30
+
+# Exports are streamed to gzip files here and served by /api/exports/<id>/download;
+# rows are fetched from the database EXPORT_CHUNK_SIZE at a time
+app.config["EXPORT_DIR"] = os.environ.get("EXPORT_DIR", os.path.join(basedir, 'exports'))
+app.config["EXPORT_CHUNK_SIZE"] = 1000
+# Export files are deleted this many days after they were written
+app.config["EXPORT_RETENTION_DAYS"] = int(os.environ.get("EXPORT_RETENTION_DAYS", 7))
+# Fleet-wide exports split the reservation id space into EXPORT_PARTITION_SIZE
+# ranges, each written by its own Celery task
+app.config["EXPORT_PARTITION_SIZE"] = 50000
+# Admin broadcasts (manual reminders/reports) are split into Celery tasks of
+# this many users each
+app.config["BROADCAST_CHUNK_SIZE"] = 200
+# Days of reminder ledger history kept
+app.config["REMINDER_LEDGER_RETENTION_DAYS"] = 30
+# A reminder that failed with a temporary error is retried at most this many
+# times a day in all, waiting REMINDER_RETRY_BACKOFF_MINUTES, then twice as
+# long, ... between attempts; permanent errors are not retried
+app.config["REMINDER_MAX_ATTEMPTS"] = 3
+app.config["REMINDER_RETRY_BACKOFF_MINUTES"] = 5
+# Rows removed per transaction when a deleted lot is purged in the background
+app.config["LOT_DELETE_BATCH_SIZE"] = 1000
 
 # Email configuration (Gmail SMTP)
 app.config['MAIL_SERVER'] = 'smtp.gmail.com'
@@ -35,6 +124,11 @@ app.config['MAIL_USE_TLS'] = True
 app.config['MAIL_USERNAME'] = 'pahariyascafe@gmail.com'  
 app.config['MAIL_PASSWORD'] = 'your mail app pass here'     
 app.config['MAIL_DEFAULT_SENDER'] = 'pahariyascafe@gmail.com'
+# Bulk mail (reminders, reports) reuses one SMTP session for up to
+# MAIL_BATCH_SIZE messages and sends at most MAIL_MAX_PER_SECOND (0 = no limit),
+# counted across all workers through Redis (per mailer while Redis is down)
+app.config['MAIL_BATCH_SIZE'] = int(os.environ.get('MAIL_BATCH_SIZE', 100))
+app.config['MAIL_MAX_PER_SECOND'] = float(os.environ.get('MAIL_MAX_PER_SECOND', 10))
 
 # Celery configuration
 app.config.update(
@@ -50,10 +144,89 @@ app.config.update(
 #using ist timezone not utc
 IST = pytz.timezone('Asia/Kolkata')
 
+class RedisCircuitBreaker:
+    """Wraps a Redis client and stops calling it for a cool-down window after
+    repeated failures, raising redis.ConnectionError immediately instead.
+
+    Pipelines are guarded on execute(); lock() is refused while open."""
+
+    def __init__(self, client, failure_threshold=3, cooldown=30):
+        self._client = client
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._open_until = 0
+
+    @property
+    def is_open(self):
+        return time.time() < self._open_until
+
+    def _check(self):
+        if self.is_open:
+            raise redis.ConnectionError("Redis circuit breaker is open")
+
+    def _guarded(self, func, *args, **kwargs):
+        self._check()
+        try:
+            result = func(*args, **kwargs)
+        except redis.RedisError:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._open_until = time.time() + self.cooldown
+                logging.warning(f"Redis circuit breaker opened for {self.cooldown}s")
+            raise
+        self._failures = 0
+        return result
+
+    def pipeline(self, *args, **kwargs):
+        pipe = self._client.pipeline(*args, **kwargs)
+        execute = pipe.execute
+        pipe.execute = lambda *a, **k: self._guarded(execute, *a, **k)
+        return pipe
+
+    def lock(self, *args, **kwargs):
+        self._check()
+        return self._client.lock(*args, **kwargs)
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+        return lambda *args, **kwargs: self._guarded(attr, *args, **kwargs)
+
 # Initialize extensions
 db = SQLAlchemy(app)
+
+@event.listens_for(Engine, "connect")
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    """Apply the SQLITE_* pragmas to every new SQLite connection"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={app.config['SQLITE_JOURNAL_MODE']}")
+    cursor.execute(f"PRAGMA busy_timeout={int(app.config['SQLITE_BUSY_TIMEOUT_MS'])}")
+    cursor.execute(f"PRAGMA synchronous={app.config['SQLITE_SYNCHRONOUS']}")
+    cursor.execute(f"PRAGMA cache_size=-{int(app.config['SQLITE_CACHE_SIZE_KB'])}")
+    cursor.close()
 mail = Mail(app)
-redis_client = redis.Redis(host='localhost', port=6379, db=0)
+redis_pool = redis.ConnectionPool.from_url(
+    app.config["REDIS_URL"],
+    max_connections=app.config["REDIS_MAX_CONNECTIONS"],
+    socket_timeout=app.config["REDIS_SOCKET_TIMEOUT"],
+    socket_connect_timeout=app.config["REDIS_SOCKET_TIMEOUT"],
+    health_check_interval=30
+)
+redis_client = RedisCircuitBreaker(
+    redis.Redis(connection_pool=redis_pool),
+    failure_threshold=app.config["REDIS_BREAKER_THRESHOLD"],
+    cooldown=app.config["REDIS_BREAKER_COOLDOWN"]
+)
+# Pub/sub blocks on reads, so it gets its own connection without a read timeout
+redis_pubsub_client = redis.Redis.from_url(
+    app.config["REDIS_URL"],
+    socket_connect_timeout=app.config["REDIS_SOCKET_TIMEOUT"],
+    health_check_interval=30
+)
 
 def make_celery(app):
     celery = Celery(
@@ -77,6 +250,22 @@ def make_celery(app):
                 'task': 'app.send_monthly_reports',
                 'schedule': 300.0,
             },
+            'reconcile-free-spot-pools': {
+                'task': 'app.reconcile_free_spot_pools',
+                'schedule': 600.0,
+            },
+            'reconcile-lot-counters': {
+                'task': 'app.reconcile_lot_counters',
+                'schedule': 600.0,
+            },
+            'warm-caches': {
+                'task': 'app.warm_caches',
+                'schedule': 60.0,
+            },
+            'purge-expired-exports': {
+                'task': 'app.purge_expired_exports',
+                'schedule': 3600.0,
+            },
         }
     )
     
@@ -105,6 +294,11 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime, default=datetime.utcnow)  # Track last activity
     
+    __table_args__ = (
+        # Inactive-user reminder scans
+        db.Index('ix_user_admin_last_login', 'is_admin', 'last_login'),
+    )
+    
     reservations = db.relationship("ReserveParkingSpot", backref="user", cascade="all, delete-orphan")
 
     def set_password(self, password):
@@ -134,25 +328,31 @@ class ParkingLot(db.Model):
     pin_code = db.Column(db.String(10), nullable=False)
     number_of_spots = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Maintained counters, kept in step with parking_spot by every booking,
+    # release, spot delete and resize (see adjust_lot_counters)
+    available_spots = db.Column(db.Integer, nullable=False, default=0)
+    occupied_spots = db.Column(db.Integer, nullable=False, default=0)
+    # Set when an admin deletes the lot; the lot is hidden and unbookable from
+    # then on while purge_parking_lot removes its rows in the background
+    deleted_at = db.Column(db.DateTime, nullable=True)
     
     parking_spots = db.relationship('ParkingSpot', backref='parking_lot', cascade="all, delete-orphan")
 
-    def to_dict(self):
-        available_spots = sum(1 for spot in self.parking_spots if spot.status == 'A')
-        occupied_spots = self.number_of_spots - available_spots
-        
-        return {
+    def to_dict(self, include_spots=True):
+        data = {
             'id': self.id,
             'prime_location_name': self.prime_location_name,
             'price': self.price,
             'address': self.address,
             'pin_code': self.pin_code,
             'number_of_spots': self.number_of_spots,
-            'available_spots': available_spots,
-            'occupied_spots': occupied_spots,
-            'spots': [spot.to_dict() for spot in self.parking_spots],
+            'available_spots': self.available_spots,
+            'occupied_spots': self.occupied_spots,
             'created_at': self.created_at.isoformat()
         }
+        if include_spots:
+            data['spots'] = [spot.to_dict() for spot in self.parking_spots]
+        return data
 
 class ParkingSpot(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -161,6 +361,11 @@ class ParkingSpot(db.Model):
     status = db.Column(db.String(1), nullable=False, default='A')  # A: Available, O: Occupied
     
     reservations = db.relationship('ReserveParkingSpot', backref='parking_spot', cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Lowest/highest free spot in a lot (booking fallback, lot resize)
+        db.Index('ix_spot_lot_status', 'lot_id', 'status', 'spot_number'),
+    )
 
     def to_dict(self):
         return {
@@ -181,6 +386,17 @@ class ReserveParkingSpot(db.Model):
     status = db.Column(db.String(10), default='active')  # active, completed
     remarks = db.Column(db.String(500), nullable=True)  # For CSV export
     
+    __table_args__ = (
+        # Newest-first history per user, used by the keyset cursor
+        db.Index('ix_reservation_user_parked', 'user_id', 'parking_timestamp', 'id'),
+        # "Does this user have an active booking" lookups
+        db.Index('ix_reservation_user_status', 'user_id', 'status'),
+        # Active reservation on a spot (release, spot details)
+        db.Index('ix_reservation_spot_status', 'spot_id', 'status'),
+        # Date range scans (monthly reports, exports)
+        db.Index('ix_reservation_parked_at', 'parking_timestamp'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -205,35 +421,552 @@ class ExportJob(db.Model):
     completed_at = db.Column(db.DateTime, nullable=True)
     file_path = db.Column(db.String(500), nullable=True)
     error_message = db.Column(db.String(500), nullable=True)
+    total_items = db.Column(db.Integer, nullable=False, default=0)
+    processed_items = db.Column(db.Integer, nullable=False, default=0)
+    failed_items = db.Column(db.Integer, nullable=False, default=0)
     
     user = db.relationship('User', backref='export_jobs')
 
+class SchemaVersion(db.Model):
+    """Migrations from MIGRATIONS that have been applied to this database"""
+    version = db.Column(db.Integer, primary_key=True)
+    description = db.Column(db.String(200), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ReminderLedger(db.Model):
+    """One row per reminder a user has been sent (or is being sent) on a day"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    reminder_type = db.Column(db.String(50), nullable=False)  # 'daily_reminder'
+    reminder_date = db.Column(db.Date, nullable=False)  # IST calendar day
+    sent_at = db.Column(db.DateTime, default=datetime.utcnow)
+    status = db.Column(db.String(20), nullable=False, default='sending')  # sending, sent, retry, failed
+    attempts = db.Column(db.Integer, nullable=False, default=1)
+    retry_at = db.Column(db.DateTime, nullable=True)  # when a 'retry' row may be claimed again
+    last_error = db.Column(db.String(500), nullable=True)
+    
+    __table_args__ = (
+        # Enforces one reminder per user per day and serves the "not yet reminded" lookup
+        db.UniqueConstraint('reminder_type', 'reminder_date', 'user_id', name='uq_reminder_ledger_type_date_user'),
+    )
+
 # Cache management functions
-def get_cache(key):
-    """Get data from Redis cache"""
+# Values are stored as {"value": ..., "fresh_until": ts}. After fresh_until a
+# value may still be served for CACHE_STALE_TTL seconds while one worker
+# rebuilds it (stale-while-revalidate).
+CACHE_STALE_TTL = 60
+CACHE_LOCK_TIMEOUT = 10  # seconds a rebuild lock is held at most
+CACHE_WAIT_TIMEOUT = 2   # seconds a worker waits for another worker's rebuild
+CACHE_INVALIDATION_CHANNEL = "cache_invalidation"
+
+class LocalCache:
+    """Bounded in-process LRU that sits in front of Redis.
+
+    Entries are only served while this process is subscribed to
+    CACHE_INVALIDATION_CHANNEL, so a delete_cache() in any worker evicts them
+    here too. If the subscription drops, the whole cache is cleared."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.listening = False
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._listener_pid = None
+
+    @property
+    def generation(self):
+        """Bumped on every eviction; lets set() skip values read before one"""
+        return self._generation
+
+    def get(self, key):
+        """Return (value, fresh_until) or None"""
+        self.ensure_listener()
+        # While Redis is failing, invalidations from other workers may be lost
+        if not self.listening or redis_client.is_open:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() >= entry[2]:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0], entry[1]
+
+    def set(self, key, value, fresh_until, expires_at, generation=None):
+        with self._lock:
+            if not self.listening or (generation is not None and generation != self._generation):
+                return
+            self._entries[key] = (value, fresh_until, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, *keys):
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def ensure_listener(self):
+        """Start the invalidation listener once per process (also after fork)"""
+        if self._listener_pid == os.getpid():
+            return
+        self._listener_pid = os.getpid()
+        self.listening = False
+        self.clear()
+        threading.Thread(target=self._listen, daemon=True).start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = redis_pubsub_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                self.listening = True
+                for message in pubsub.listen():
+                    self.evict(*json.loads(message['data']))
+            except Exception as e:
+                logging.error(f"Cache invalidation listener error: {e}")
+            self.listening = False
+            self.clear()
+            time.sleep(5)
+
+local_cache = LocalCache(max_entries=4096)
+
+def get_cache_entry(key):
+    """Get (value, is_fresh) from the local cache or Redis, or None on a miss"""
+    local_entry = local_cache.get(key)
+    if local_entry is not None and time.time() < local_entry[1]:
+        return local_entry[0], True
+    
     try:
+        generation = local_cache.generation
         data = redis_client.get(key)
-        if data:
-            return json.loads(data)
+        if data is not None:
+            entry = json.loads(data)
+            local_cache.set(
+                key, entry['value'], entry['fresh_until'],
+                entry['fresh_until'] + CACHE_STALE_TTL, generation
+            )
+            return entry['value'], time.time() < entry['fresh_until']
     except Exception as e:
         logging.error(f"Cache get error: {e}")
     return None
 
+def get_cache(key):
+    """Get data from Redis cache (None only on a miss, stale values included)"""
+    entry = get_cache_entry(key)
+    return entry[0] if entry is not None else None
+
 def set_cache(key, value, timeout=300):
-    """Set data in Redis cache with expiry"""
+    """Set data in Redis cache, fresh for timeout seconds then briefly stale"""
     try:
-        redis_client.setex(key, timeout, json.dumps(value))
+        generation = local_cache.generation
+        entry = {'value': value, 'fresh_until': time.time() + timeout}
+        redis_client.setex(key, timeout + CACHE_STALE_TTL, json.dumps(entry))
+        local_cache.set(
+            key, value, entry['fresh_until'],
+            entry['fresh_until'] + CACHE_STALE_TTL, generation
+        )
     except Exception as e:
         logging.error(f"Cache set error: {e}")
 
+def get_cache_many(keys):
+    """Get {key: (value, is_fresh)} for the cached keys among keys; fresh
+    local hits skip Redis and the rest are fetched with a single MGET"""
+    found = {}
+    remote_keys = []
+    for key in keys:
+        local_entry = local_cache.get(key)
+        if local_entry is not None and time.time() < local_entry[1]:
+            found[key] = local_entry[0], True
+        else:
+            remote_keys.append(key)
+    
+    if remote_keys:
+        try:
+            generation = local_cache.generation
+            for key, data in zip(remote_keys, redis_client.mget(remote_keys)):
+                if data is None:
+                    continue
+                entry = json.loads(data)
+                local_cache.set(
+                    key, entry['value'], entry['fresh_until'],
+                    entry['fresh_until'] + CACHE_STALE_TTL, generation
+                )
+                found[key] = entry['value'], time.time() < entry['fresh_until']
+        except Exception as e:
+            logging.error(f"Cache mget error: {e}")
+    return found
+
+def set_cache_many(values, timeout=300):
+    """Set several keys in one pipelined round trip"""
+    try:
+        if not values:
+            return
+        generation = local_cache.generation
+        fresh_until = time.time() + timeout
+        pipe = redis_client.pipeline(transaction=False)
+        for key, value in values.items():
+            pipe.setex(key, timeout + CACHE_STALE_TTL, json.dumps({'value': value, 'fresh_until': fresh_until}))
+        pipe.execute()
+        for key, value in values.items():
+            local_cache.set(key, value, fresh_until, fresh_until + CACHE_STALE_TTL, generation)
+    except Exception as e:
+        logging.error(f"Cache mset error: {e}")
+
+def acquire_rebuild_lock(key):
+    """Try to take the rebuild lock for key without waiting.
+
+    Returns (acquired, lock). Without Redis there is nothing to coordinate
+    on, so the caller may build: (True, None)."""
+    try:
+        lock = redis_client.lock(f"lock:{key}", timeout=CACHE_LOCK_TIMEOUT)
+        if lock.acquire(blocking=False):
+            return True, lock
+        return False, None
+    except Exception as e:
+        logging.error(f"Cache lock error: {e}")
+        return True, None
+
+def release_rebuild_lock(lock):
+    if lock is not None:
+        try:
+            lock.release()
+        except Exception as e:
+            logging.error(f"Cache unlock error: {e}")
+
+def wait_for_cache(keys):
+    """Wait up to CACHE_WAIT_TIMEOUT for other workers to store keys and
+    return the values that appeared"""
+    found = {}
+    deadline = time.time() + CACHE_WAIT_TIMEOUT
+    while len(found) < len(keys) and time.time() < deadline:
+        time.sleep(0.05)
+        pending = [key for key in keys if key not in found]
+        found.update({key: entry[0] for key, entry in get_cache_many(pending).items()})
+    return found
+
+def get_or_build_cache(key, build, timeout=300):
+    """Return the cached value for key, letting only one worker rebuild it.
+
+    The worker that wins the rebuild lock calls build() and stores the result.
+    Everyone else gets the stale value if there is one, or waits briefly for
+    the winner's result; they only build it themselves if it never appears."""
+    entry = get_cache_entry(key)
+    if entry is not None and entry[1]:
+        return entry[0]
+    
+    acquired, lock = acquire_rebuild_lock(key)
+    if not acquired:
+        if entry is not None:
+            return entry[0]
+        
+        found = wait_for_cache([key])
+        if key in found:
+            return found[key]
+    
+    try:
+        value = build()
+        set_cache(key, value, timeout)
+        return value
+    finally:
+        release_rebuild_lock(lock)
+
 def delete_cache(*keys):
-    """Delete cache keys"""
+    """Delete cache keys here, in Redis and in every worker's local cache"""
     try:
         if keys:
-            redis_client.delete(*keys)
+            local_cache.evict(*keys)
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.delete(*keys)
+            pipe.publish(CACHE_INVALIDATION_CHANNEL, json.dumps(keys))
+            pipe.execute()
     except Exception as e:
         logging.error(f"Cache delete error: {e}")
 
+def evict_local_caches(*keys):
+    """Drop keys from every worker's local cache after Redis was updated in place"""
+    try:
+        if keys:
+            local_cache.evict(*keys)
+            redis_client.publish(CACHE_INVALIDATION_CHANNEL, json.dumps(keys))
+    except Exception as e:
+        logging.error(f"Cache evict error: {e}")
+
+# Refresh-ahead invalidations are collected in CACHE_REFRESH_PENDING_KEY and
+# rebuilt by a single refresh_pending_cache_keys task per CACHE_REFRESH_WINDOW,
+# so a burst of bookings costs one rebuild of each shared key, not one per booking
+CACHE_REFRESH_PENDING_KEY = "cache_refresh_pending"
+CACHE_REFRESH_SCHEDULED_KEY = "cache_refresh_scheduled"
+
+def invalidate_cache(*keys):
+    """Delete keys after a mutation, or in refresh-ahead mode have a worker
+    rebuild the shared ones in place so readers keep hitting the cache"""
+    refreshable = [key for key in keys if is_refreshable_cache_key(key)]
+    if not app.config.get("CACHE_REFRESH_AHEAD") or not refreshable:
+        delete_cache(*keys)
+        return
+    
+    delete_cache(*[key for key in keys if key not in refreshable])
+    try:
+        window = app.config["CACHE_REFRESH_WINDOW"]
+        pipe = redis_client.pipeline()
+        pipe.sadd(CACHE_REFRESH_PENDING_KEY, *refreshable)
+        # Expires on its own in case the scheduled task is lost
+        pipe.set(CACHE_REFRESH_SCHEDULED_KEY, 1, nx=True, ex=max(int(window * 10), 30))
+        _, schedule = pipe.execute()
+        if schedule:
+            try:
+                refresh_pending_cache_keys.apply_async(countdown=window)
+            except Exception:
+                redis_client.delete(CACHE_REFRESH_SCHEDULED_KEY)
+                raise
+    except Exception as e:
+        logging.error(f"Cache refresh scheduling error: {e}")
+        delete_cache(*refreshable)
+
+# Lot listings are assembled from one cached fragment per lot and listing
+# variant, so a booking only invalidates the fragments of the lot it touched
+LOT_FRAGMENT_TIMEOUTS = {"admin": 300, "admin_summary": 300, "user": 120, "user_summary": 120}
+LOT_FRAGMENT_VARIANTS = tuple(LOT_FRAGMENT_TIMEOUTS)
+LOT_IDS_CACHE_KEY = "parking_lot_ids"
+
+def lot_fragment_key(variant, lot_id):
+    return f"lot_fragment_{variant}_{lot_id}"
+
+def parse_lot_fragment_key(key):
+    """Return (variant, lot_id) for a fragment key, or None"""
+    if not key.startswith("lot_fragment_"):
+        return None
+    variant, lot_id = key[len("lot_fragment_"):].rsplit("_", 1)
+    return variant, int(lot_id)
+
+def lot_cache_keys(*lot_ids):
+    """Cache keys to clear when the spots or details of these lots change"""
+    keys = [lot_fragment_key(variant, lot_id) for lot_id in lot_ids for variant in LOT_FRAGMENT_VARIANTS]
+    keys.append("admin_charts_data")
+    return keys
+
+def is_summary_request():
+    """True when the client asked for counts only (?summary=1)"""
+    return request.args.get('summary', '').lower() in ('1', 'true', 'yes')
+
+def paginated_response(items, load_page=None):
+    """Slice a list by ?page=&per_page= and report the totals in headers.
+
+    load_page, if given, turns the selected slice into the response items."""
+    load_page = load_page or (lambda page_items: page_items)
+    page = request.args.get('page', type=int)
+    if page is None:
+        return jsonify(load_page(items)), 200
+    
+    page = max(page, 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+    start = (page - 1) * per_page
+    
+    response = jsonify(load_page(items[start:start + per_page]))
+    response.headers['X-Total-Count'] = str(len(items))
+    response.headers['X-Page'] = str(page)
+    response.headers['X-Per-Page'] = str(per_page)
+    return response, 200
+
+# Free spot pools: one Redis sorted set per lot (member = spot id, score = spot
+# number) so booking can pop the next free spot without scanning parking_spot.
+# Lots whose pool has been built are tracked in FREE_SPOT_POOLS_KEY; any lot
+# missing from it (e.g. after a Redis restart) falls back to the database.
+FREE_SPOT_POOLS_KEY = "free_spot_pools"
+# At most one on-demand rebuild per lot is queued in this many seconds
+FREE_SPOT_REBUILD_INTERVAL = 60
+
+def free_spot_pool_key(lot_id):
+    return f"free_spots_{lot_id}"
+
+def pop_free_spot(lot_id):
+    """Pop the lowest-numbered spot id from a lot's pool.
+
+    Returns (pool_ready, spot_id); spot_id is None when the pool is empty."""
+    try:
+        pipe = redis_client.pipeline()
+        pipe.sismember(FREE_SPOT_POOLS_KEY, lot_id)
+        pipe.zpopmin(free_spot_pool_key(lot_id))
+        ready, popped = pipe.execute()
+        if ready:
+            return True, int(popped[0][0]) if popped else None
+    except Exception as e:
+        logging.error(f"Free spot pool pop error: {e}")
+    return False, None
+
+def push_free_spots(lot_id, spot_numbers):
+    """Return spots ({spot_id: spot_number}) to a lot's pool if it has been built"""
+    try:
+        if spot_numbers and redis_client.sismember(FREE_SPOT_POOLS_KEY, lot_id):
+            redis_client.zadd(free_spot_pool_key(lot_id), spot_numbers)
+    except Exception as e:
+        logging.error(f"Free spot pool push error: {e}")
+
+def prune_free_spots(lot_id, spot_ids):
+    """Remove spot ids from a lot's pool"""
+    try:
+        if spot_ids:
+            redis_client.zrem(free_spot_pool_key(lot_id), *spot_ids)
+    except Exception as e:
+        logging.error(f"Free spot pool prune error: {e}")
+
+def drop_free_spot_pool(lot_id):
+    """Forget a lot's pool entirely"""
+    try:
+        pipe = redis_client.pipeline()
+        pipe.srem(FREE_SPOT_POOLS_KEY, lot_id)
+        pipe.delete(free_spot_pool_key(lot_id))
+        pipe.execute()
+    except Exception as e:
+        logging.error(f"Free spot pool drop error: {e}")
+
+def rebuild_free_spot_pool(lot_id, spots=None):
+    """Replace a lot's pool with the available spots currently in the database"""
+    if spots is None:
+        spots = db.session.query(ParkingSpot.id, ParkingSpot.spot_number).filter_by(
+            lot_id=lot_id,
+            status='A'
+        ).all()
+    try:
+        pipe = redis_client.pipeline()
+        pipe.delete(free_spot_pool_key(lot_id))
+        if spots:
+            pipe.zadd(free_spot_pool_key(lot_id), {spot.id: spot.spot_number for spot in spots})
+        pipe.sadd(FREE_SPOT_POOLS_KEY, lot_id)
+        pipe.execute()
+    except Exception as e:
+        logging.error(f"Free spot pool rebuild error: {e}")
+
+def schedule_free_spot_pool_rebuild(lot_id):
+    """Queue one rebuild of a lot's pool, however many bookings notice it is off"""
+    try:
+        if redis_client.set(f"free_spots_rebuild_{lot_id}", 1, nx=True, ex=FREE_SPOT_REBUILD_INTERVAL):
+            rebuild_lot_free_spot_pool.delay(lot_id)
+    except Exception as e:
+        logging.error(f"Free spot pool rebuild scheduling error: {e}")
+
+def adjust_lot_counters(lot_id, available=0, occupied=0):
+    """Shift a lot's maintained spot counters with an atomic SQL increment"""
+    ParkingLot.query.filter_by(id=lot_id).update({
+        ParkingLot.available_spots: ParkingLot.available_spots + available,
+        ParkingLot.occupied_spots: ParkingLot.occupied_spots + occupied
+    }, synchronize_session=False)
+
+# Spots are inserted and deleted with set-based statements in batches of this
+# many rows (also keeps IN lists under the database's parameter limit)
+SPOT_BATCH_SIZE = 5000
+
+def insert_spots(lot_id, first_number, last_number):
+    """Bulk insert available spots numbered first_number..last_number and
+    return the new rows as {spot_id: spot_number}"""
+    # Spot numbers can repeat older ones once spots have been deleted, so the
+    # new rows are told apart by id: they all come after the lot's last spot
+    last_spot_id = db.session.query(db.func.max(ParkingSpot.id)).filter(
+        ParkingSpot.lot_id == lot_id
+    ).scalar() or 0
+    
+    for start in range(first_number, last_number + 1, SPOT_BATCH_SIZE):
+        db.session.execute(ParkingSpot.__table__.insert(), [
+            {'lot_id': lot_id, 'spot_number': number, 'status': 'A'}
+            for number in range(start, min(start + SPOT_BATCH_SIZE, last_number + 1))
+        ])
+    
+    return dict(db.session.query(ParkingSpot.id, ParkingSpot.spot_number).filter(
+        ParkingSpot.lot_id == lot_id,
+        ParkingSpot.id > last_spot_id
+    ).all())
+
+def remove_available_spots(lot_id, count):
+    """Delete up to count available spots, highest numbers first, along with
+    their reservation history. Returns (candidate spot ids, number deleted);
+    a spot booked meanwhile is skipped."""
+    spot_ids = [spot_id for (spot_id,) in db.session.query(ParkingSpot.id).filter_by(
+        lot_id=lot_id,
+        status='A'
+    ).order_by(ParkingSpot.spot_number.desc()).limit(count)]
+    
+    removed = 0
+    for start in range(0, len(spot_ids), SPOT_BATCH_SIZE):
+        still_available = db.select(ParkingSpot.id).where(
+            ParkingSpot.id.in_(spot_ids[start:start + SPOT_BATCH_SIZE]),
+            ParkingSpot.status == 'A'
+        )
+        ReserveParkingSpot.query.filter(
+            ReserveParkingSpot.spot_id.in_(still_available)
+        ).delete(synchronize_session=False)
+        removed += ParkingSpot.query.filter(
+            ParkingSpot.id.in_(still_available)
+        ).delete(synchronize_session=False)
+    
+    return spot_ids, removed
+
+def claim_spot(spot_id, lot_id):
+    """Flip a spot from available to occupied in one conditional UPDATE.
+
+    Returns True only for the caller whose UPDATE actually changed the row.
+    Spots of a lot being deleted are never claimed."""
+    lot_deleted = db.exists().where(ParkingLot.id == lot_id, ParkingLot.deleted_at.isnot(None))
+    claimed = ParkingSpot.query.filter_by(id=spot_id, lot_id=lot_id, status='A').filter(
+        ~lot_deleted
+    ).update({'status': 'O'}, synchronize_session=False)
+    if claimed == 1:
+        adjust_lot_counters(lot_id, available=-1, occupied=1)
+    return claimed == 1
+
+def lowest_free_spot_id(lot_id):
+    """Id of the lowest-numbered available spot of a lot, from the database"""
+    return db.session.query(ParkingSpot.id).filter_by(
+        lot_id=lot_id,
+        status='A'
+    ).order_by(ParkingSpot.spot_number).limit(1).scalar()
+
+def claim_available_spot(lot_id, max_attempts=5):
+    """Claim the lowest-numbered free spot in a lot and return it, or None.
+
+    A built pool can miss free spots (a push lost to a Redis error, or a
+    release racing a rebuild); when it runs dry while the lot counter still
+    shows free spots, the database is searched instead and the pool rebuilt."""
+    for _ in range(max_attempts):
+        pool_ready, candidate_id = pop_free_spot(lot_id)
+        
+        if not pool_ready:
+            candidate_id = lowest_free_spot_id(lot_id)
+            if candidate_id is None:
+                return None
+        elif candidate_id is None:
+            break
+        
+        # Another request may win this candidate between picking it and the
+        # UPDATE (or the pool held a stale id); just move on to the next one
+        if claim_spot(candidate_id, lot_id):
+            return db.session.get(ParkingSpot, candidate_id)
+    
+    free_spots = db.session.query(ParkingLot.available_spots).filter_by(
+        id=lot_id,
+        deleted_at=None
+    ).scalar()
+    if not free_spots:
+        return None
+    
+    schedule_free_spot_pool_rebuild(lot_id)
+    for _ in range(max_attempts):
+        candidate_id = lowest_free_spot_id(lot_id)
+        if candidate_id is None:
+            return None
+        if claim_spot(candidate_id, lot_id):
+            return db.session.get(ParkingSpot, candidate_id)
+    return None
+
 def is_logged_in():
     return 'user_id' in session
 
@@ -292,6 +1025,8 @@ def register():
         db.session.add(user)
         db.session.commit()
         
+        invalidate_cache("admin_dashboard_stats")
+        
         return jsonify({'message': 'User registered successfully'}), 201
         
     except Exception as e:
@@ -346,24 +1081,103 @@ def get_current_user_info():
     return jsonify({'user': user.to_dict()}), 200
 
 # Enhanced Admin Routes with Caching
+def user_lot_dict(lot, include_spots=True):
+    """Serialize a lot for the user listing"""
+    data = {
+        'id': lot.id,
+        'prime_location_name': lot.prime_location_name,
+        'price': lot.price,
+        'address': lot.address,
+        'pin_code': lot.pin_code,
+        'number_of_spots': lot.number_of_spots,
+        'available_spots': lot.available_spots,
+        'occupied_spots': lot.occupied_spots
+    }
+    if include_spots:
+        data['spots'] = [{
+            'id': spot.id,
+            'spot_number': spot.spot_number,
+            'status': spot.status
+        } for spot in lot.parking_spots]
+    return data
+
+def build_lot_fragments(variant, lot_ids):
+    """Serialize the given lots for one listing variant, keyed by lot id"""
+    include_spots = not variant.endswith('_summary')
+    serialize = ParkingLot.to_dict if variant.startswith('admin') else user_lot_dict
+    
+    query = ParkingLot.query.filter(ParkingLot.id.in_(lot_ids), ParkingLot.deleted_at.is_(None))
+    if include_spots:
+        query = query.options(db.selectinload(ParkingLot.parking_spots))
+    return {lot.id: serialize(lot, include_spots=include_spots) for lot in query.all()}
+
+def load_lot_fragments(variant, lot_ids):
+    """Assemble lot dicts from cached fragments (one MGET).
+
+    Missing or stale fragments are rebuilt like get_or_build_cache does for
+    a single key: under a per-fragment lock, with stale fragments served and
+    missing ones awaited while another worker holds the lock."""
+    keys = {lot_id: lot_fragment_key(variant, lot_id) for lot_id in lot_ids}
+    cached = get_cache_many(list(keys.values()))
+    values = {key: entry[0] for key, entry in cached.items()}
+    
+    build_ids, waiting_ids, locks = [], [], []
+    for lot_id, key in keys.items():
+        entry = cached.get(key)
+        if entry is not None and entry[1]:
+            continue
+        acquired, lock = acquire_rebuild_lock(key)
+        if acquired:
+            build_ids.append(lot_id)
+            locks.append(lock)
+        elif entry is None:
+            waiting_ids.append(lot_id)
+    
+    def build(ids):
+        built = {keys[lot_id]: data for lot_id, data in build_lot_fragments(variant, ids).items()}
+        set_cache_many(built, LOT_FRAGMENT_TIMEOUTS[variant])
+        values.update(built)
+    
+    try:
+        if build_ids:
+            # A rebuild may have finished between the MGET and taking the lock
+            rechecked = get_cache_many([keys[lot_id] for lot_id in build_ids])
+            values.update({key: entry[0] for key, entry in rechecked.items() if entry[1]})
+            build_ids = [lot_id for lot_id in build_ids if not rechecked.get(keys[lot_id], (None, False))[1]]
+        if build_ids:
+            build(build_ids)
+    finally:
+        for lock in locks:
+            release_rebuild_lock(lock)
+    
+    if waiting_ids:
+        values.update(wait_for_cache([keys[lot_id] for lot_id in waiting_ids]))
+        unfinished_ids = [lot_id for lot_id in waiting_ids if keys[lot_id] not in values]
+        if unfinished_ids:
+            build(unfinished_ids)
+    
+    # Lots deleted since the id list was cached simply drop out
+    return [values[keys[lot_id]] for lot_id in lot_ids if keys[lot_id] in values]
+
+def build_lot_ids():
+    return [lot_id for (lot_id,) in db.session.query(ParkingLot.id).filter(
+        ParkingLot.deleted_at.is_(None)
+    ).order_by(ParkingLot.id)]
+
+def lot_listing_response(variant):
+    """Paginated lot listing for one variant, assembled from fragments"""
+    lot_ids = get_or_build_cache(LOT_IDS_CACHE_KEY, build_lot_ids, 300)
+    return paginated_response(lot_ids, lambda page_ids: load_lot_fragments(variant, page_ids))
+
 @app.route('/api/admin/parking-lots', methods=['GET'])
 def get_all_parking_lots():
     if not is_logged_in() or not is_admin():
         return jsonify({'error': 'Admin access required'}), 403
     
-    cache_key = "admin_parking_lots"
-    cached_data = get_cache(cache_key)
-    
-    if cached_data:
-        return jsonify(cached_data), 200
-    
-    lots = ParkingLot.query.all()
-    lots_data = [lot.to_dict() for lot in lots]
+    variant = "admin_summary" if is_summary_request() else "admin"
     
-    # Cache for 5 minutes
-    set_cache(cache_key, lots_data, 300)
-    
-    return jsonify(lots_data), 200
+    # Fragments cached for 5 minutes
+    return lot_listing_response(variant)
 
 @app.route('/api/admin/parking-lots', methods=['POST'])
 def create_parking_lot():
@@ -383,56 +1197,255 @@ def create_parking_lot():
             price=float(data['price']),
             address=data['address'],
             pin_code=data['pin_code'],
-            number_of_spots=int(data['number_of_spots'])
+            number_of_spots=int(data['number_of_spots']),
+            available_spots=int(data['number_of_spots']),
+            occupied_spots=0
         )
         
         db.session.add(parking_lot)
-        db.session.commit()
+        db.session.flush()
         
-        # Create parking spots
-        for i in range(1, int(data['number_of_spots']) + 1):
-            spot = ParkingSpot(
-                lot_id=parking_lot.id,
-                spot_number=i,
-                status='A'
-            )
-            db.session.add(spot)
+        # Create parking spots in the same transaction as the lot
+        insert_spots(parking_lot.id, 1, int(data['number_of_spots']))
         
         db.session.commit()
         
+        rebuild_free_spot_pool(parking_lot.id)
+        
         # Clear related caches
-        delete_cache("admin_parking_lots", "user_parking_lots", "admin_dashboard_stats")
+        invalidate_cache(LOT_IDS_CACHE_KEY, "admin_charts_data", "admin_dashboard_stats")
         
-        return jsonify({'message': 'Parking lot created successfully', 'lot': parking_lot.to_dict()}), 201
+        # Spots are served by /api/parking-lots/<lot_id>/spots
+        return jsonify({
+            'message': 'Parking lot created successfully',
+            'lot': parking_lot.to_dict(include_spots=False)
+        }), 201
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+class BulkMailer:
+    """Sends a run of messages over one SMTP session instead of opening a new
+    session per mail.send().
+
+    The session is opened on the first send and recycled every batch_size
+    messages; a dropped session is reopened and the message retried once.
+    Permanent SMTP errors (refused recipient, rejected data) are raised and
+    the session kept. Sends are paced to max_per_second (0 = unlimited); with
+    a rate_key the pace is shared through Redis by every mailer using that
+    key, in any worker, and kept per mailer only while Redis is unavailable."""
+
+    def __init__(self, mail, batch_size=100, max_per_second=0, rate_key=None):
+        self.mail = mail
+        self.batch_size = batch_size
+        self.min_interval = 1.0 / max_per_second if max_per_second else 0
+        self.rate_key = rate_key
+        self._connection = None
+        self._batch_count = 0
+        self._next_send_at = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def send(self, msg):
+        self._throttle()
+        
+        for attempt in range(2):
+            if self._connection is None:
+                self._open()
+            try:
+                self._connection.send(msg)
+                break
+            except (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError):
+                self._discard()
+                if attempt:
+                    raise
+        
+        self._batch_count += 1
+        if self._batch_count >= self.batch_size:
+            self.close()
+
+    def close(self):
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                connection.__exit__(None, None, None)
+            except (smtplib.SMTPException, OSError):
+                pass
+
+    def _open(self):
+        connection = self.mail.connect()
+        connection.__enter__()
+        self._connection = connection
+        self._batch_count = 0
+
+    def _discard(self):
+        connection, self._connection = self._connection, None
+        if connection is not None and connection.host is not None:
+            connection.host.close()
+
+    def _throttle(self):
+        if not self.min_interval:
+            return
+        if self.rate_key:
+            try:
+                wait = reserve_mail_slot(self.rate_key, self.min_interval)
+                if wait > 0:
+                    time.sleep(wait)
+                return
+            except Exception as e:
+                logging.error(f"Shared mail rate error: {e}")
+        now = time.monotonic()
+        if now < self._next_send_at:
+            time.sleep(self._next_send_at - now)
+        self._next_send_at = max(now, self._next_send_at) + self.min_interval
+
+# Hands out send slots interval seconds apart, by the Redis clock so every
+# worker agrees, and returns how long the caller waits for its slot (as a
+# string: Lua numbers are truncated to integers on the way out)
+MAIL_RATE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local slot = math.max(now, tonumber(redis.call('GET', KEYS[1]) or '0'))
+local interval = tonumber(ARGV[1])
+redis.call('SET', KEYS[1], tostring(slot + interval), 'PX', math.ceil((slot + interval - now) * 1000) + 1000)
+return tostring(slot - now)
+"""
+
+def reserve_mail_slot(key, interval):
+    """Reserve the next send slot of the rate shared under key and return
+    the seconds to wait for it"""
+    return float(redis_client.eval(MAIL_RATE_SCRIPT, 1, key, interval))
+
+def bulk_mailer():
+    """Mailer whose pace is shared by all workers sending from the account"""
+    return BulkMailer(
+        mail,
+        batch_size=app.config['MAIL_BATCH_SIZE'],
+        max_per_second=app.config['MAIL_MAX_PER_SECOND'],
+        rate_key=f"mail_rate_{app.config['MAIL_USERNAME']}"
+    )
+
+DAILY_REMINDER = 'daily_reminder'
+
+def reminder_due():
+    """Ledger rows that do not keep a user from being reminded: temporary
+    failures whose retry time has come"""
+    return db.and_(ReminderLedger.status == 'retry', ReminderLedger.retry_at <= datetime.utcnow())
+
+def claim_reminder(user_id, reminder_type, day):
+    """Record a reminder in the ledger before sending it; False if the user
+    already has one for that day that is not due for a retry"""
+    retried = ReminderLedger.query.filter(
+        ReminderLedger.user_id == user_id,
+        ReminderLedger.reminder_type == reminder_type,
+        ReminderLedger.reminder_date == day,
+        reminder_due()
+    ).update({
+        ReminderLedger.status: 'sending',
+        ReminderLedger.attempts: ReminderLedger.attempts + 1,
+        ReminderLedger.sent_at: datetime.utcnow(),
+    }, synchronize_session=False)
+    if retried:
+        db.session.commit()
+        return True
+    
+    try:
+        db.session.add(ReminderLedger(user_id=user_id, reminder_type=reminder_type, reminder_date=day))
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+        return False
+
+def is_temporary_mail_error(error):
+    """True for failures worth retrying: lost connections and 4xx SMTP replies"""
+    if isinstance(error, (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)):
+        return True
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return False
+
+def finish_reminder(user_id, reminder_type, day, error=None):
+    """Mark a claimed reminder sent, or after a failed send schedule a retry
+    (temporary error, attempts left) or give up on it for the day"""
+    row = ReminderLedger.query.filter_by(
+        user_id=user_id, reminder_type=reminder_type, reminder_date=day
+    ).one()
+    
+    if error is None:
+        row.status = 'sent'
+        row.retry_at = None
+    elif is_temporary_mail_error(error) and row.attempts < app.config["REMINDER_MAX_ATTEMPTS"]:
+        backoff = app.config["REMINDER_RETRY_BACKOFF_MINUTES"] * 2 ** (row.attempts - 1)
+        row.status = 'retry'
+        row.retry_at = datetime.utcnow() + timedelta(minutes=backoff)
+        row.last_error = str(error)[:500]
+    else:
+        row.status = 'failed'
+        row.retry_at = None
+        row.last_error = str(error)[:500]
+    db.session.commit()
+
+def prune_reminder_ledger(reminder_type, today):
+    """Delete ledger rows older than REMINDER_LEDGER_RETENTION_DAYS"""
+    cutoff = today - timedelta(days=app.config["REMINDER_LEDGER_RETENTION_DAYS"])
+    ReminderLedger.query.filter(
+        ReminderLedger.reminder_type == reminder_type,
+        ReminderLedger.reminder_date < cutoff
+    ).delete(synchronize_session=False)
+    db.session.commit()
+
 # Celery Tasks
 @celery.task(name='app.send_daily_reminders')
 def send_daily_reminders():
-    """Send daily reminders to inactive users"""
-    with app.app_context():
+    """Send daily reminders to inactive users who have not had one today.
+
+    Runs every minute; the reminder ledger makes repeat runs on the same day
+    only pick up users who became eligible since, or whose send failed with
+    a temporary error and is due for a retry."""
+    with app.app_context(), bulk_mailer() as mailer:
         try:
+            today = datetime.now(IST).date()
+            prune_reminder_ledger(DAILY_REMINDER, today)
+            
             # Get users who haven't logged in for the last 7 days
             week_ago = datetime.utcnow() - timedelta(days=7)
             
-            inactive_users = db.session.query(User).filter(
+            # Plain rows, not entities: the per-user ledger commits would expire them
+            inactive_users = db.session.query(User.id, User.email, User.full_name).filter(
                 User.is_admin == False,
                 db.or_(
                     User.last_login < week_ago,
                     User.last_login == None
+                ),
+                ~db.exists().where(
+                    ReminderLedger.reminder_type == DAILY_REMINDER,
+                    ReminderLedger.reminder_date == today,
+                    ReminderLedger.user_id == User.id,
+                    ~reminder_due()
                 )
             ).all()
             
+            if not inactive_users:
+                return "Daily reminders sent to 0 users"
+            
             # Get available parking lots
-            available_lots = db.session.query(ParkingLot).join(ParkingSpot).filter(
-                ParkingSpot.status == 'A'
-            ).distinct().limit(5).all()
+            available_lots = db.session.query(
+                ParkingLot.prime_location_name, ParkingLot.address, ParkingLot.price
+            ).filter(ParkingLot.available_spots > 0, ParkingLot.deleted_at.is_(None)).limit(5).all()
             
             sent_count = 0
             for user in inactive_users:
+                # Another run may have reached this user first
+                if not claim_reminder(user.id, DAILY_REMINDER, today):
+                    continue
                 try:
                     # reminder email content
                     subject = "UrbanPark - Daily Parking Reminder"
@@ -486,11 +1499,14 @@ def send_daily_reminders():
                         recipients=[user.email],
                         html=html_content
                     )
-                    mail.send(msg)
+                    mailer.send(msg)
+                    finish_reminder(user.id, DAILY_REMINDER, today)
                     sent_count += 1
                     
                 except Exception as e:
                     logging.error(f"Failed to send reminder to {user.email}: {e}")
+                    db.session.rollback()
+                    finish_reminder(user.id, DAILY_REMINDER, today, e)
                     continue
             
             return f"Daily reminders sent to {sent_count} users"
@@ -499,41 +1515,133 @@ def send_daily_reminders():
             logging.error(f"Daily reminder task failed: {e}")
             return f"Daily reminder task failed: {str(e)}"
 
+# Monthly reports are built from a few set-based queries over the whole month,
+# each ordered by user id and streamed, then zipped per user; only one user's
+# bookings are in memory at a time.
+REPORT_CHUNK_SIZE = 1000
+
+def monthly_report_period(now=None):
+    """Start and end (exclusive) of the previous calendar month"""
+    now = now or datetime.utcnow()
+    start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    start_of_last_month = (start_of_month - timedelta(days=1)).replace(day=1)
+    return start_of_last_month, start_of_month
+
+def user_id_range(first_user_id=None, last_user_id=None):
+    """Conditions limiting User.id to first_user_id..last_user_id (either optional)"""
+    filters = []
+    if first_user_id is not None:
+        filters.append(User.id >= first_user_id)
+    if last_user_id is not None:
+        filters.append(User.id <= last_user_id)
+    return filters
+
+def iter_monthly_reports(start, end, include_inactive=False, first_user_id=None, last_user_id=None):
+    """Yield one report dict per non-admin user, in user id order, with the
+    user's booking totals, spend, most used lot and bookings between start
+    and end. Users without bookings are only included if include_inactive;
+    first_user_id/last_user_id restrict the users covered."""
+    user_filters = user_id_range(first_user_id, last_user_id)
+    
+    def month_query(*columns):
+        return db.session.query(*columns).join(
+            ParkingSpot, ReserveParkingSpot.spot_id == ParkingSpot.id
+        ).join(
+            ParkingLot, ParkingSpot.lot_id == ParkingLot.id
+        ).join(
+            User, ReserveParkingSpot.user_id == User.id
+        ).filter(
+            User.is_admin == False,
+            *user_filters,
+            ReserveParkingSpot.parking_timestamp >= start,
+            ReserveParkingSpot.parking_timestamp < end
+        ).execution_options(yield_per=REPORT_CHUNK_SIZE)
+    
+    totals = month_query(
+        ReserveParkingSpot.user_id,
+        db.func.count(ReserveParkingSpot.id).label('total_bookings'),
+        db.func.sum(db.case((ReserveParkingSpot.status == 'completed', 1), else_=0)).label('completed_bookings'),
+        db.func.coalesce(db.func.sum(ReserveParkingSpot.parking_cost), 0).label('total_spent')
+    ).group_by(ReserveParkingSpot.user_id).order_by(ReserveParkingSpot.user_id)
+    
+    # Most used lot first within each user
+    lot_usage = month_query(
+        ReserveParkingSpot.user_id,
+        ParkingLot.prime_location_name
+    ).group_by(
+        ReserveParkingSpot.user_id, ParkingLot.id
+    ).order_by(
+        ReserveParkingSpot.user_id, db.func.count(ReserveParkingSpot.id).desc(), ParkingLot.id
+    )
+    
+    bookings = month_query(
+        ReserveParkingSpot.user_id,
+        ReserveParkingSpot.spot_id,
+        ReserveParkingSpot.vehicle_number,
+        ReserveParkingSpot.parking_timestamp,
+        ReserveParkingSpot.leaving_timestamp,
+        ReserveParkingSpot.parking_cost,
+        ParkingLot.prime_location_name
+    ).order_by(ReserveParkingSpot.user_id, ReserveParkingSpot.parking_timestamp)
+    
+    # All three share the same joins and filters, so they list the same users
+    active = (
+        (total, next(lots).prime_location_name, list(rows))
+        for total, (_, lots), (_, rows) in zip(
+            totals,
+            groupby(lot_usage, key=lambda row: row.user_id),
+            groupby(bookings, key=lambda row: row.user_id)
+        )
+    )
+    next_active = next(active, None)
+    
+    users = db.session.query(User.id, User.email, User.full_name).filter(
+        User.is_admin == False,
+        *user_filters
+    ).order_by(User.id).execution_options(yield_per=REPORT_CHUNK_SIZE)
+    
+    for user in users:
+        if next_active and next_active[0].user_id == user.id:
+            total, most_used_lot, rows = next_active
+            next_active = next(active, None)
+            yield {
+                'user_id': user.id,
+                'email': user.email,
+                'full_name': user.full_name,
+                'total_bookings': total.total_bookings,
+                'completed_bookings': total.completed_bookings,
+                'total_spent': float(total.total_spent),
+                'most_used_lot': most_used_lot,
+                'reservations': rows,
+            }
+        elif include_inactive:
+            yield {
+                'user_id': user.id,
+                'email': user.email,
+                'full_name': user.full_name,
+                'total_bookings': 0,
+                'completed_bookings': 0,
+                'total_spent': 0.0,
+                'most_used_lot': "None",
+                'reservations': [],
+            }
+
 @celery.task(name='app.send_monthly_reports')
 def send_monthly_reports():
     """Send monthly activity reports to all users"""
-    with app.app_context():
+    with app.app_context(), bulk_mailer() as mailer:
         try:
-            now = datetime.utcnow()
-            start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            start_of_last_month = (start_of_month - timedelta(days=1)).replace(day=1)
-            
-            users = db.session.query(User).filter(User.is_admin == False).all()
+            start_of_last_month, start_of_month = monthly_report_period()
             sent_count = 0
             
-            for user in users:
+            # Only users with activity last month are yielded
+            for report in iter_monthly_reports(start_of_last_month, start_of_month):
                 try:
-                    # Get user's bookings for last month
-                    reservations = db.session.query(ReserveParkingSpot).filter(
-                        ReserveParkingSpot.user_id == user.id,
-                        ReserveParkingSpot.parking_timestamp >= start_of_last_month,
-                        ReserveParkingSpot.parking_timestamp < start_of_month
-                    ).all()
-                    
-                    if not reservations:
-                        continue  # Skip users with no activity
-                    
-                    # Calculate statistics
-                    total_bookings = len(reservations)
-                    total_spent = sum(r.parking_cost or 0 for r in reservations)
-                    completed_bookings = len([r for r in reservations if r.status == 'completed'])
-                    
-                    # Find most used parking lot
-                    lot_usage = {}
-                    for r in reservations:
-                        lot_name = r.parking_spot.parking_lot.prime_location_name
-                        lot_usage[lot_name] = lot_usage.get(lot_name, 0) + 1
-                    most_used_lot = max(lot_usage.items(), key=lambda x: x[1])[0] if lot_usage else "None"
+                    reservations = report['reservations']
+                    total_bookings = report['total_bookings']
+                    total_spent = report['total_spent']
+                    completed_bookings = report['completed_bookings']
+                    most_used_lot = report['most_used_lot']
                     
                     # monthly parking report
                     subject = f"🅿️ Your Monthly Parking Report - {start_of_last_month.strftime('%B %Y')}"
@@ -558,7 +1666,7 @@ def send_monthly_reports():
                         <div class="container">
                             <div class="header">
                                 <h1>UrbanPark Monthly Report</h1>
-                                <h2>{user.full_name}</h2>
+                                <h2>{report['full_name']}</h2>
                                 <p>Activity Report for {start_of_last_month.strftime('%B %Y')}</p>
                             </div>
                             
@@ -595,7 +1703,7 @@ def send_monthly_reports():
                                     {''.join([
                                         f'''<tr>
                                             <td>{r.parking_timestamp.strftime("%Y-%m-%d")}</td>
-                                            <td>{r.parking_spot.parking_lot.prime_location_name}</td>
+                                            <td>{r.prime_location_name}</td>
                                             <td>{r.spot_id}</td>
                                             <td>{r.vehicle_number}</td>
                                             <td>{f"{((r.leaving_timestamp - r.parking_timestamp).total_seconds() / 3600):.1f}h" if r.leaving_timestamp else "Ongoing"}</td>
@@ -616,14 +1724,14 @@ def send_monthly_reports():
                     # Send email
                     msg = Message(
                         subject=subject,
-                        recipients=[user.email],
+                        recipients=[report['email']],
                         html=html_content
                     )
-                    mail.send(msg)
+                    mailer.send(msg)
                     sent_count += 1
                     
                 except Exception as e:
-                    logging.error(f"Failed to send monthly report to {user.email}: {e}")
+                    logging.error(f"Failed to send monthly report to {report['email']}: {e}")
                     continue
             
             return f"Monthly reports sent to {sent_count} users"
@@ -632,9 +1740,501 @@ def send_monthly_reports():
             logging.error(f"Monthly report task failed: {e}")
             return f"Monthly report task failed: {str(e)}"
 
+@celery.task(name='app.reconcile_free_spot_pools')
+def reconcile_free_spot_pools():
+    """Rebuild every lot's free spot pool from the database"""
+    with app.app_context():
+        try:
+            free_spots = {lot_id: [] for (lot_id,) in db.session.query(ParkingLot.id).filter(
+                ParkingLot.deleted_at.is_(None)
+            )}
+            
+            for spot in db.session.query(ParkingSpot.id, ParkingSpot.spot_number, ParkingSpot.lot_id).filter(
+                ParkingSpot.status == 'A'
+            ):
+                if spot.lot_id in free_spots:
+                    free_spots[spot.lot_id].append(spot)
+            
+            for lot_id, spots in free_spots.items():
+                rebuild_free_spot_pool(lot_id, spots)
+            
+            return f"Free spot pools rebuilt for {len(free_spots)} lots"
+            
+        except Exception as e:
+            logging.error(f"Free spot pool reconcile failed: {e}")
+            return f"Free spot pool reconcile failed: {str(e)}"
+
+@celery.task(name='app.rebuild_lot_free_spot_pool')
+def rebuild_lot_free_spot_pool(lot_id):
+    """Rebuild one lot's free spot pool from the database"""
+    with app.app_context():
+        try:
+            if not db.session.query(ParkingLot.id).filter_by(id=lot_id, deleted_at=None).first():
+                return f"Lot {lot_id} not found"
+            
+            rebuild_free_spot_pool(lot_id)
+            return f"Free spot pool rebuilt for lot {lot_id}"
+            
+        except Exception as e:
+            logging.error(f"Free spot pool rebuild for lot {lot_id} failed: {e}")
+            return f"Free spot pool rebuild failed: {str(e)}"
+
+@celery.task(name='app.reconcile_lot_counters')
+def reconcile_lot_counters():
+    """Recount spot statuses per lot and fix any drifted counters"""
+    with app.app_context():
+        try:
+            def spot_count(status):
+                return db.select(db.func.count(ParkingSpot.id)).where(
+                    ParkingSpot.lot_id == ParkingLot.id,
+                    ParkingSpot.status == status
+                ).scalar_subquery()
+            
+            drifted = db.and_(
+                ParkingLot.deleted_at.is_(None),
+                db.or_(
+                    ParkingLot.available_spots != spot_count('A'),
+                    ParkingLot.occupied_spots != spot_count('O')
+                )
+            )
+            
+            fixed_lot_ids = []
+            for lot_id, available_spots, occupied_spots, available, occupied in db.session.query(
+                ParkingLot.id, ParkingLot.available_spots, ParkingLot.occupied_spots,
+                spot_count('A'), spot_count('O')
+            ).filter(drifted):
+                logging.warning(
+                    f"Lot {lot_id} counters drifted: available {available_spots} -> {available}, "
+                    f"occupied {occupied_spots} -> {occupied}"
+                )
+                fixed_lot_ids.append(lot_id)
+            
+            # Counted and written in one statement, so bookings and releases
+            # committed since the check above are never overwritten
+            if fixed_lot_ids:
+                db.session.execute(db.update(ParkingLot).where(
+                    ParkingLot.id.in_(fixed_lot_ids),
+                    drifted
+                ).values(
+                    available_spots=spot_count('A'),
+                    occupied_spots=spot_count('O')
+                ).execution_options(synchronize_session=False))
+            
+            db.session.commit()
+            
+            if fixed_lot_ids:
+                invalidate_cache(*lot_cache_keys(*fixed_lot_ids), "admin_dashboard_stats")
+            
+            return f"Lot counters fixed for {len(fixed_lot_ids)} lots"
+            
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Lot counter reconcile failed: {e}")
+            return f"Lot counter reconcile failed: {str(e)}"
+
+# Shared keys a worker can rebuild on its own: key -> (builder, timeout)
+CACHE_REBUILDERS = {
+    LOT_IDS_CACHE_KEY: (lambda: build_lot_ids(), 300),
+    "admin_charts_data": (lambda: build_admin_charts_data(), 300),
+    "admin_dashboard_stats": (lambda: build_admin_dashboard_stats(), 300),
+}
+
+def is_refreshable_cache_key(key):
+    return key in CACHE_REBUILDERS or parse_lot_fragment_key(key) is not None
+
+@celery.task(name='app.refresh_cache_keys')
+def refresh_cache_keys(keys, only_cached=True):
+    """Rebuild cache keys in place (refresh-ahead) and drop local copies.
+
+    With only_cached, keys that are not in Redis right now are skipped so
+    rarely used variants are not rebuilt on every mutation."""
+    with app.app_context():
+        try:
+            if only_cached:
+                pipe = redis_client.pipeline(transaction=False)
+                for key in keys:
+                    pipe.exists(key)
+                keys = [key for key, exists in zip(keys, pipe.execute()) if exists]
+            
+            fragment_ids = {}
+            for key in keys:
+                if key in CACHE_REBUILDERS:
+                    build, timeout = CACHE_REBUILDERS[key]
+                    set_cache(key, build(), timeout)
+                else:
+                    variant, lot_id = parse_lot_fragment_key(key)
+                    fragment_ids.setdefault(variant, []).append(lot_id)
+            
+            gone_keys = []
+            for variant, lot_ids in fragment_ids.items():
+                built = build_lot_fragments(variant, lot_ids)
+                set_cache_many(
+                    {lot_fragment_key(variant, lot_id): data for lot_id, data in built.items()},
+                    LOT_FRAGMENT_TIMEOUTS[variant]
+                )
+                gone_keys.extend(lot_fragment_key(variant, lot_id) for lot_id in lot_ids if lot_id not in built)
+            
+            delete_cache(*gone_keys)
+            evict_local_caches(*keys)
+            
+            return f"Refreshed {len(keys)} cache keys"
+            
+        except Exception as e:
+            logging.error(f"Cache refresh task failed: {e}")
+            delete_cache(*keys)
+            return f"Cache refresh task failed: {str(e)}"
+
+@celery.task(name='app.refresh_pending_cache_keys')
+def refresh_pending_cache_keys():
+    """Refresh every key invalidated since the last run in one pass"""
+    with app.app_context():
+        try:
+            # Clearing the flag in the same transaction lets the next
+            # invalidation schedule a new run for anything added after this
+            pipe = redis_client.pipeline()
+            pipe.delete(CACHE_REFRESH_SCHEDULED_KEY)
+            pipe.smembers(CACHE_REFRESH_PENDING_KEY)
+            pipe.delete(CACHE_REFRESH_PENDING_KEY)
+            _, pending, _ = pipe.execute()
+        except Exception as e:
+            logging.error(f"Pending cache refresh failed: {e}")
+            return f"Pending cache refresh failed: {str(e)}"
+        
+        keys = sorted(key.decode() if isinstance(key, bytes) else key for key in pending)
+        if not keys:
+            return "No cache keys to refresh"
+        return refresh_cache_keys(keys)
+
+@celery.task(name='app.warm_caches')
+def warm_caches():
+    """Pre-build the hot shared keys so user-facing reads almost never miss"""
+    with app.app_context():
+        try:
+            lot_ids = build_lot_ids()
+            keys = list(CACHE_REBUILDERS)
+            keys.extend(lot_fragment_key(variant, lot_id) for variant in ("user_summary", "admin_summary") for lot_id in lot_ids)
+            return refresh_cache_keys(keys, only_cached=False)
+            
+        except Exception as e:
+            logging.error(f"Cache warm task failed: {e}")
+            return f"Cache warm task failed: {str(e)}"
+
+@beat_init.connect
+def warm_caches_on_beat_start(sender=None, **kwargs):
+    """Warm the caches as soon as the beat scheduler starts"""
+    warm_caches.delay()
+
+RESERVATION_EXPORT_HEADER = [
+    'Reservation ID', 'Slot ID', 'Spot ID', 'Parking Lot', 'Spot Number',
+    'Vehicle Number', 'Parking Timestamp', 'Leaving Timestamp', 
+    'Duration (hours)', 'Cost (₹)', 'Status', 'Remarks'
+]
+
+def reservation_export_query():
+    """Plain column rows for RESERVATION_EXPORT_HEADER, streamed from the
+    database in EXPORT_CHUNK_SIZE batches instead of loaded as ORM objects"""
+    return db.session.query(
+        ReserveParkingSpot.id,
+        ParkingSpot.lot_id,
+        ReserveParkingSpot.spot_id,
+        ParkingLot.prime_location_name,
+        ParkingSpot.spot_number,
+        ReserveParkingSpot.vehicle_number,
+        ReserveParkingSpot.parking_timestamp,
+        ReserveParkingSpot.leaving_timestamp,
+        ReserveParkingSpot.parking_cost,
+        ReserveParkingSpot.status,
+        ReserveParkingSpot.remarks
+    ).join(
+        ParkingSpot, ReserveParkingSpot.spot_id == ParkingSpot.id
+    ).join(
+        ParkingLot, ParkingSpot.lot_id == ParkingLot.id
+    ).execution_options(yield_per=app.config["EXPORT_CHUNK_SIZE"])
+
+def reservation_export_row(row):
+    """Format one reservation_export_query() row for the CSV"""
+    duration = ''
+    if row.leaving_timestamp:
+        duration = f"{((row.leaving_timestamp - row.parking_timestamp).total_seconds() / 3600):.1f}"
+    
+    return [
+        row.id,
+        row.lot_id,
+        row.spot_id,
+        row.prime_location_name,
+        row.spot_number,
+        row.vehicle_number,
+        row.parking_timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+        row.leaving_timestamp.strftime('%Y-%m-%d %H:%M:%S') if row.leaving_timestamp else '',
+        duration,
+        row.parking_cost or '',
+        row.status,
+        row.remarks or ''
+    ]
+
+def export_file_path(filename):
+    """Absolute path for an export file, creating EXPORT_DIR if needed"""
+    os.makedirs(app.config["EXPORT_DIR"], exist_ok=True)
+    return os.path.join(app.config["EXPORT_DIR"], secure_filename(filename))
+
+def write_csv_gz(path, header, rows):
+    """Stream rows into a gzip compressed CSV and return how many were written
+    (header may be None, e.g. for parts that are concatenated later).
+
+    Writes to a temporary name and renames on success, so a half written file
+    is never visible at path."""
+    partial_path = f"{path}.part"
+    count = 0
+    try:
+        with gzip.open(partial_path, 'wt', encoding='utf-8', newline='') as output:
+            writer = csv.writer(output)
+            if header:
+                writer.writerow(header)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        os.replace(partial_path, path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    return count
+
+# Fleet-wide reservation export (admin). A chord of export_reservation_part
+# tasks writes one part per reservation id range, so any number of workers
+# share the work (EXPORT_DIR must be shared between them); finish_reservation_export
+# then joins the parts in id order: gzip members can be concatenated as-is and
+# Parquet parts are copied row group by row group.
+def fleet_export_filters(options):
+    """Query conditions for the lot/date options of a fleet export"""
+    filters = parking_date_filters(options.get('date_from'), options.get('date_to'))
+    if options.get('lot_id'):
+        filters.append(ParkingSpot.lot_id == options['lot_id'])
+    return filters
+
+def reservation_parquet_schema():
+    return pa.schema([
+        ('reservation_id', pa.int64()),
+        ('lot_id', pa.int64()),
+        ('spot_id', pa.int64()),
+        ('parking_lot', pa.string()),
+        ('spot_number', pa.int64()),
+        ('vehicle_number', pa.string()),
+        ('parking_timestamp', pa.timestamp('ms')),
+        ('leaving_timestamp', pa.timestamp('ms')),
+        ('duration_hours', pa.float64()),
+        ('cost', pa.float64()),
+        ('status', pa.string()),
+        ('remarks', pa.string()),
+    ])
+
+def write_parquet_part(path, rows):
+    """Write rows to a Parquet file, one row group per EXPORT_CHUNK_SIZE rows"""
+    schema = reservation_parquet_schema()
+    chunk_size = app.config["EXPORT_CHUNK_SIZE"]
+    count = 0
+    
+    with pq.ParquetWriter(path, schema) as writer:
+        chunk = []
+        for row in rows:
+            chunk.append({
+                'reservation_id': row.id,
+                'lot_id': row.lot_id,
+                'spot_id': row.spot_id,
+                'parking_lot': row.prime_location_name,
+                'spot_number': row.spot_number,
+                'vehicle_number': row.vehicle_number,
+                'parking_timestamp': row.parking_timestamp,
+                'leaving_timestamp': row.leaving_timestamp,
+                'duration_hours': (
+                    (row.leaving_timestamp - row.parking_timestamp).total_seconds() / 3600
+                    if row.leaving_timestamp else None
+                ),
+                'cost': row.parking_cost,
+                'status': row.status,
+                'remarks': row.remarks,
+            })
+            if len(chunk) >= chunk_size:
+                writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+            count += len(chunk)
+    return count
+
+def join_export_parts(path, part_paths, file_format):
+    """Combine part files in order into path"""
+    partial_path = f"{path}.part"
+    try:
+        if file_format == 'parquet':
+            with pq.ParquetWriter(partial_path, reservation_parquet_schema()) as writer:
+                for part_path in part_paths:
+                    part = pq.ParquetFile(part_path)
+                    for index in range(part.num_row_groups):
+                        writer.write_table(part.read_row_group(index))
+        else:
+            write_csv_gz(partial_path, RESERVATION_EXPORT_HEADER, [])
+            with open(partial_path, 'ab') as output:
+                for part_path in part_paths:
+                    with open(part_path, 'rb') as part:
+                        shutil.copyfileobj(part, output)
+        os.replace(partial_path, path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+def fail_export_job(job_id, error):
+    """Mark an export job failed (after rolling back the current transaction)"""
+    db.session.rollback()
+    job = ExportJob.query.get(job_id)
+    if job:
+        job.status = 'failed'
+        job.error_message = str(error)[:500]
+        db.session.commit()
+
+@celery.task(name='app.export_all_reservations')
+def export_all_reservations(job_id, options):
+    """Export every reservation matching options (lot_id, date_from, date_to,
+    format) for an admin: split the id range into part tasks joined by
+    finish_reservation_export"""
+    with app.app_context():
+        try:
+            job = ExportJob.query.get(job_id)
+            if not job:
+                return "Export job not found"
+            
+            filters = fleet_export_filters(options)
+            first_id, last_id, total = db.session.query(
+                db.func.min(ReserveParkingSpot.id),
+                db.func.max(ReserveParkingSpot.id),
+                db.func.count(ReserveParkingSpot.id)
+            ).join(ParkingSpot, ReserveParkingSpot.spot_id == ParkingSpot.id).filter(*filters).one()
+            
+            job.status = 'processing'
+            job.total_items = total
+            job.processed_items = 0
+            db.session.commit()
+            
+            extension = 'parquet' if options['format'] == 'parquet' else 'csv.gz'
+            file_path = export_file_path(f'reservations_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}')
+            parts_dir = f"{file_path}.parts"
+            os.makedirs(parts_dir, exist_ok=True)
+            
+            partition_size = app.config["EXPORT_PARTITION_SIZE"]
+            ranges = []
+            if total:
+                ranges = [
+                    (start, min(start + partition_size - 1, last_id))
+                    for start in range(first_id, last_id + 1, partition_size)
+                ]
+            part_paths = [
+                os.path.join(parts_dir, f"part_{index:05d}.{extension}") for index in range(len(ranges))
+            ]
+            
+            finish = finish_reservation_export.si(job_id, file_path, part_paths, options['format'])
+            if not ranges:
+                finish.delay()
+                return "Reservation export has no records"
+            
+            chord(
+                export_reservation_part.si(job_id, part_path, start, end, options)
+                for part_path, (start, end) in zip(part_paths, ranges)
+            )(finish)
+            
+            return f"Reservation export split into {len(ranges)} parts for {total} records"
+            
+        except Exception as e:
+            logging.error(f"Reservation export task failed: {e}")
+            fail_export_job(job_id, e)
+            return f"Reservation export task failed: {str(e)}"
+
+@celery.task(name='app.export_reservation_part')
+def export_reservation_part(job_id, part_path, first_id, last_id, options):
+    """Write reservations first_id..last_id matching options to one part file
+    and add its row count to the job"""
+    with app.app_context():
+        try:
+            rows = reservation_export_query().filter(
+                ReserveParkingSpot.id.between(first_id, last_id),
+                *fleet_export_filters(options)
+            ).order_by(ReserveParkingSpot.id)
+            
+            if options['format'] == 'parquet':
+                count = write_parquet_part(part_path, rows)
+            else:
+                count = write_csv_gz(part_path, None, (reservation_export_row(row) for row in rows))
+            
+            ExportJob.query.filter_by(id=job_id).update({
+                ExportJob.processed_items: ExportJob.processed_items + count
+            }, synchronize_session=False)
+            db.session.commit()
+            return count
+            
+        except Exception as e:
+            # Raising stops the chord, so finish_reservation_export never runs
+            logging.error(f"Reservation export part {first_id}-{last_id} failed: {e}")
+            fail_export_job(job_id, e)
+            shutil.rmtree(os.path.dirname(part_path), ignore_errors=True)
+            raise
+
+@celery.task(name='app.finish_reservation_export')
+def finish_reservation_export(job_id, file_path, part_paths, file_format):
+    """Join the finished parts of a fleet export and complete the job"""
+    with app.app_context():
+        try:
+            join_export_parts(file_path, part_paths, file_format)
+            
+            job = ExportJob.query.get(job_id)
+            job.status = 'completed'
+            job.completed_at = datetime.utcnow()
+            job.file_path = file_path
+            db.session.commit()
+            
+            return f"Reservation export completed: {job.processed_items} records"
+            
+        except Exception as e:
+            logging.error(f"Reservation export join failed: {e}")
+            fail_export_job(job_id, e)
+            return f"Reservation export join failed: {str(e)}"
+        
+        finally:
+            shutil.rmtree(f"{file_path}.parts", ignore_errors=True)
+
+@celery.task(name='app.purge_expired_exports')
+def purge_expired_exports():
+    """Delete export files older than EXPORT_RETENTION_DAYS, including parts
+    left behind by failed jobs, and drop the download links to them"""
+    with app.app_context():
+        try:
+            cutoff = datetime.utcnow() - timedelta(days=app.config["EXPORT_RETENTION_DAYS"])
+            removed = 0
+            
+            if os.path.isdir(app.config["EXPORT_DIR"]):
+                for entry in os.scandir(app.config["EXPORT_DIR"]):
+                    if datetime.utcfromtimestamp(entry.stat().st_mtime) >= cutoff:
+                        continue
+                    if entry.is_dir():
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                    else:
+                        os.remove(entry.path)
+                    removed += 1
+            
+            ExportJob.query.filter(
+                ExportJob.file_path.isnot(None),
+                ExportJob.completed_at < cutoff
+            ).update({ExportJob.file_path: None}, synchronize_session=False)
+            db.session.commit()
+            
+            return f"Removed {removed} expired export files"
+            
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Export cleanup failed: {e}")
+            return f"Export cleanup failed: {str(e)}"
+
 @celery.task(name='app.export_user_data_csv')
 def export_user_data_csv(user_id, job_id):
-    """Export user parking data as CSV"""
+    """Export user parking data as a gzip compressed CSV on disk"""
     with app.app_context():
         try:
             # Update job status to processing
@@ -651,49 +2251,25 @@ def export_user_data_csv(user_id, job_id):
                     db.session.commit()
                 return "User not found"
             
-            reservations = ReserveParkingSpot.query.filter_by(user_id=user_id).order_by(
+            filename = f'parking_data_{user.full_name.replace(" ", "_")}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv.gz'
+            file_path = export_file_path(filename)
+            
+            rows = reservation_export_query().filter(
+                ReserveParkingSpot.user_id == user_id
+            ).order_by(
                 ReserveParkingSpot.parking_timestamp.desc()
-            ).all()
+            )
+            total_records = write_csv_gz(
+                file_path, RESERVATION_EXPORT_HEADER, (reservation_export_row(row) for row in rows)
+            )
             
-            # Create CSV content
-            output = io.StringIO()
-            writer = csv.writer(output)
+            # Update job status to completed before mailing so the file can be downloaded
+            if job:
+                job.status = 'completed'
+                job.completed_at = datetime.utcnow()
+                job.file_path = file_path
+                db.session.commit()
             
-            # Write header
-            writer.writerow([
-                'Reservation ID', 'Slot ID', 'Spot ID', 'Parking Lot', 'Spot Number',
-                'Vehicle Number', 'Parking Timestamp', 'Leaving Timestamp', 
-                'Duration (hours)', 'Cost (₹)', 'Status', 'Remarks'
-            ])
-            
-            # Write data
-            for reservation in reservations:
-                duration = ''
-                if reservation.leaving_timestamp:
-                    duration = f"{((reservation.leaving_timestamp - reservation.parking_timestamp).total_seconds() / 3600):.1f}"
-                
-                writer.writerow([
-                    reservation.id,
-                    reservation.parking_spot.lot_id,
-                    reservation.spot_id,
-                    reservation.parking_spot.parking_lot.prime_location_name,
-                    reservation.parking_spot.spot_number,
-                    reservation.vehicle_number,
-                    reservation.parking_timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                    reservation.leaving_timestamp.strftime('%Y-%m-%d %H:%M:%S') if reservation.leaving_timestamp else '',
-                    duration,
-                    reservation.parking_cost or '',
-                    reservation.status,
-                    reservation.remarks or ''
-                ])
-            
-            csv_content = output.getvalue()
-            output.close()
-            
-            # Create filename and save path
-            filename = f'parking_data_{user.full_name.replace(" ", "_")}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-            
-            # Creating email with CSV file attached
             subject = "🅿️ Your Parking Data Export is Ready"
             html_content = f"""
             <html>
@@ -706,9 +2282,9 @@ def export_user_data_csv(user_id, job_id):
                     <div style="background: #f8f9fa; padding: 20px; border-radius: 5px; margin: 20px 0;">
                         <h3>📊 Export Summary:</h3>
                         <ul>
-                            <li><strong>Total Records:</strong> {len(reservations)}</li>
+                            <li><strong>Total Records:</strong> {total_records}</li>
                             <li><strong>Export Date:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</li>
-                            <li><strong>File Format:</strong> CSV</li>
+                            <li><strong>File Format:</strong> CSV (gzip compressed)</li>
                         </ul>
                     </div>
                     
@@ -721,7 +2297,7 @@ def export_user_data_csv(user_id, job_id):
                         <li>Status and remarks</li>
                     </ul>
                     
-                    <p>The CSV file is attached to this email.</p>
+                    <p>Download the file from your dashboard while signed in. It is kept for {app.config["EXPORT_RETENTION_DAYS"]} days.</p>
                     
                     <div style="text-align: center; margin-top: 30px;">
                         <a href="http://localhost:8080/dashboard" style="background: #007bff; color: white; padding: 12px 25px; text-decoration: none; border-radius: 5px;">Visit Dashboard</a>
@@ -736,28 +2312,18 @@ def export_user_data_csv(user_id, job_id):
             </body>
             </html>
             """
-            # Send email with attachment
             msg = Message(
                 subject=subject,
                 recipients=[user.email],
                 html=html_content
             )
             
-            # Attach CSV file
-            msg.attach(
-                filename,
-                "text/csv",
-                csv_content
-            )
-            
-            mail.send(msg)
-            
-            # Update job status to completed
-            if job:
-                job.status = 'completed'
-                job.completed_at = datetime.utcnow()
-                job.file_path = filename
-                db.session.commit()
+            try:
+                mail.send(msg)
+            except Exception as e:
+                # The export itself succeeded and is downloadable from the dashboard
+                logging.error(f"CSV export email to {user.email} failed: {e}")
+                return f"CSV export completed for {user.full_name}, email failed: {str(e)}"
             
             return f"CSV export completed and sent to {user.full_name}"
             
@@ -772,20 +2338,24 @@ def export_user_data_csv(user_id, job_id):
             
             return f"CSV export task failed: {str(e)}"
 
-def send_daily_reminders_manual():
-    """Send daily reminders to ALL users when admin clicks and it sends whether active or not"""
-    with app.app_context():
+def send_daily_reminders_manual(first_user_id=None, last_user_id=None):
+    """Send daily reminders to ALL users (or one user id range of them) when
+    admin clicks, whether active or not; returns (sent, failed)"""
+    with app.app_context(), bulk_mailer() as mailer:
         try:
             # Get ALL regular users (not just inactive ones)
             all_users = db.session.query(User).filter(
-                User.is_admin == False
+                User.is_admin == False,
+                *user_id_range(first_user_id, last_user_id)
             ).all()
             
-            available_lots = db.session.query(ParkingLot).join(ParkingSpot).filter(
-                ParkingSpot.status == 'A'
-            ).distinct().limit(5).all()
+            available_lots = ParkingLot.query.filter(
+                ParkingLot.available_spots > 0,
+                ParkingLot.deleted_at.is_(None)
+            ).limit(5).all()
             
             sent_count = 0
+            failed_count = 0
             for user in all_users:
                 try:
                     subject = "UrbanPark - Manual Daily Reminder (Admin Triggered)"
@@ -833,51 +2403,43 @@ def send_daily_reminders_manual():
                         recipients=[user.email],
                         html=html_content
                     )
-                    mail.send(msg)
+                    mailer.send(msg)
                     sent_count += 1
                     
                 except Exception as e:
                     logging.error(f"Failed to send manual reminder to {user.email}: {e}")
+                    failed_count += 1
                     continue
             
-            return f"Manual daily reminders sent to ALL {sent_count} users"
+            return sent_count, failed_count
             
         except Exception as e:
-            return f"Manual daily reminder failed: {str(e)}"
+            logging.error(f"Manual daily reminder failed: {e}")
+            raise
 
-def send_monthly_reports_manual():
-    """Send monthly reports to ALL users when admin clicks"""
-    with app.app_context():
+def send_monthly_reports_manual(first_user_id=None, last_user_id=None):
+    """Send monthly reports to ALL users (or one user id range of them) when
+    admin clicks; returns (sent, failed)"""
+    with app.app_context(), bulk_mailer() as mailer:
         try:
-            now = datetime.utcnow()
-            start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            start_of_last_month = (start_of_month - timedelta(days=1)).replace(day=1)
-            
-            # Get ALL users (not just those with activity)
-            all_users = db.session.query(User).filter(User.is_admin == False).all()
+            start_of_last_month, start_of_month = monthly_report_period()
             sent_count = 0
+            failed_count = 0
             
-            for user in all_users:
+            # ALL users (not just those with activity)
+            for report in iter_monthly_reports(
+                start_of_last_month, start_of_month, include_inactive=True,
+                first_user_id=first_user_id, last_user_id=last_user_id
+            ):
                 try:
-                    # Get user's bookings for last month
-                    reservations = db.session.query(ReserveParkingSpot).filter(
-                        ReserveParkingSpot.user_id == user.id,
-                        ReserveParkingSpot.parking_timestamp >= start_of_last_month,
-                        ReserveParkingSpot.parking_timestamp < start_of_month
-                    ).all()
+                    # Statistics (even if 0 bookings)
+                    total_bookings = report['total_bookings']
+                    total_spent = report['total_spent']
+                    completed_bookings = report['completed_bookings']
                     
-                    # Calculate statistics (even if 0 bookings)
-                    total_bookings = len(reservations)
-                    total_spent = sum(r.parking_cost or 0 for r in reservations)
-                    completed_bookings = len([r for r in reservations if r.status == 'completed'])
-                    
-                    if reservations:
+                    if report['reservations']:
                         # Has activity - send detailed report
-                        lot_usage = {}
-                        for r in reservations:
-                            lot_name = r.parking_spot.parking_lot.prime_location_name
-                            lot_usage[lot_name] = lot_usage.get(lot_name, 0) + 1
-                        most_used_lot = max(lot_usage.items(), key=lambda x: x[1])[0] if lot_usage else "None"
+                        most_used_lot = report['most_used_lot']
                         avg_cost = total_spent / total_bookings if total_bookings > 0 else 0
                         
                         activity_section = f"""
@@ -917,7 +2479,7 @@ def send_monthly_reports_manual():
                         <div style="max-width: 700px; margin: 0 auto; background: white; border-radius: 10px; border: 2px solid #007bff;">
                             <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0;">
                                 <h1>UrbanPark Manual Monthly Report</h1>
-                                <h2>{user.full_name}</h2>
+                                <h2>{report['full_name']}</h2>
                                 <p>Manual Report for {start_of_last_month.strftime('%B %Y')}</p>
                                 <p><strong>⚡ Sent by Admin to ALL users on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</strong></p>
                             </div>
@@ -945,20 +2507,114 @@ def send_monthly_reports_manual():
                     
                     msg = Message(
                         subject=subject,
-                        recipients=[user.email],
+                        recipients=[report['email']],
                         html=html_content
                     )
-                    mail.send(msg)
+                    mailer.send(msg)
                     sent_count += 1
                     
                 except Exception as e:
-                    logging.error(f"Failed to send manual report to {user.email}: {e}")
+                    logging.error(f"Failed to send manual report to {report['email']}: {e}")
+                    failed_count += 1
                     continue
             
-            return f"Manual monthly reports sent to ALL {sent_count} users"
+            return sent_count, failed_count
+            
+        except Exception as e:
+            logging.error(f"Manual monthly report failed: {e}")
+            raise
+
+# Admin broadcasts run as a dispatcher task that splits the non-admin users
+# into BROADCAST_CHUNK_SIZE id ranges and one send_broadcast_chunk task per
+# range, so any number of workers can share the work. Progress is kept on an
+# ExportJob: processed_items = sent, failed_items = failed.
+BROADCAST_SENDERS = {
+    'daily_reminders': send_daily_reminders_manual,
+    'monthly_reports': send_monthly_reports_manual,
+}
+
+def user_id_chunks(size):
+    """Yield (first_id, last_id, count) for consecutive runs of size non-admin users"""
+    user_ids = db.session.query(User.id).filter(
+        User.is_admin == False
+    ).order_by(User.id).execution_options(yield_per=REPORT_CHUNK_SIZE)
+    
+    chunk = []
+    for (user_id,) in user_ids:
+        chunk.append(user_id)
+        if len(chunk) == size:
+            yield chunk[0], chunk[-1], len(chunk)
+            chunk = []
+    if chunk:
+        yield chunk[0], chunk[-1], len(chunk)
+
+def record_broadcast_progress(job_id, sent, failed):
+    """Add a chunk's results to the job and complete it once every user is counted"""
+    ExportJob.query.filter_by(id=job_id).update({
+        ExportJob.processed_items: ExportJob.processed_items + sent,
+        ExportJob.failed_items: ExportJob.failed_items + failed,
+    }, synchronize_session=False)
+    ExportJob.query.filter(
+        ExportJob.id == job_id,
+        ExportJob.status == 'processing',
+        ExportJob.processed_items + ExportJob.failed_items >= ExportJob.total_items
+    ).update({
+        ExportJob.status: 'completed',
+        ExportJob.completed_at: datetime.utcnow(),
+    }, synchronize_session=False)
+    db.session.commit()
+
+@celery.task(name='app.dispatch_broadcast')
+def dispatch_broadcast(job_id, kind):
+    """Split a manual broadcast into chunk tasks"""
+    with app.app_context():
+        try:
+            chunks = list(user_id_chunks(app.config["BROADCAST_CHUNK_SIZE"]))
+            total = sum(count for _, _, count in chunks)
+            
+            job = ExportJob.query.get(job_id)
+            job.total_items = total
+            job.status = 'processing' if total else 'completed'
+            job.completed_at = None if total else datetime.utcnow()
+            db.session.commit()
+            
+            for first_user_id, last_user_id, count in chunks:
+                send_broadcast_chunk.delay(job_id, kind, first_user_id, last_user_id, count)
+            
+            return f"Broadcast {job_id} split into {len(chunks)} chunks for {total} users"
+            
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Broadcast dispatch failed: {e}")
+            
+            job = ExportJob.query.get(job_id)
+            if job:
+                job.status = 'failed'
+                job.error_message = str(e)[:500]
+                db.session.commit()
             
+            return f"Broadcast dispatch failed: {str(e)}"
+
+@celery.task(name='app.send_broadcast_chunk')
+def send_broadcast_chunk(job_id, kind, first_user_id, last_user_id, count):
+    """Send one user id range of a manual broadcast and record the results"""
+    with app.app_context():
+        try:
+            sent, failed = BROADCAST_SENDERS[kind](first_user_id, last_user_id)
         except Exception as e:
-            return f"Manual monthly report failed: {str(e)}"
+            logging.error(f"Broadcast chunk {first_user_id}-{last_user_id} failed: {e}")
+            sent, failed = 0, count
+        
+        # Users removed since dispatch count as failed so the job still completes
+        failed = max(failed, count - sent)
+        
+        try:
+            record_broadcast_progress(job_id, sent, failed)
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Broadcast progress update failed: {e}")
+        
+        return f"Broadcast chunk {first_user_id}-{last_user_id}: {sent} sent, {failed} failed"
 
 # CSV Export Routes
 @app.route('/api/export-csv', methods=['POST'])
@@ -992,47 +2648,133 @@ def trigger_csv_export():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/admin/export-reservations', methods=['POST'])
+def trigger_reservations_export():
+    """Start a fleet-wide reservation export; optional JSON body:
+    lot_id, date_from, date_to (YYYY-MM-DD) and format ('csv' or 'parquet')"""
+    if not is_logged_in() or not is_admin():
+        return jsonify({'error': 'Admin access required'}), 403
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        options = {
+            'lot_id': data.get('lot_id'),
+            'date_from': data.get('date_from'),
+            'date_to': data.get('date_to'),
+            'format': data.get('format') or 'csv',
+        }
+        
+        if options['format'] not in ('csv', 'parquet'):
+            return jsonify({'error': 'format must be csv or parquet'}), 400
+        if options['format'] == 'parquet' and pq is None:
+            return jsonify({'error': 'Parquet export requires pyarrow to be installed'}), 400
+        if options['lot_id'] and not db.session.query(ParkingLot.id).filter_by(
+            id=options['lot_id'], deleted_at=None
+        ).first():
+            return jsonify({'error': 'Parking lot not found'}), 404
+        try:
+            parking_date_filters(options['date_from'], options['date_to'])
+        except ValueError:
+            return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+        
+        user_id = session['user_id']
+        job_id = f"reservations_export_{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        
+        export_job = ExportJob(
+            id=job_id,
+            user_id=user_id,
+            job_type='reservations_export',
+            status='pending'
+        )
+        db.session.add(export_job)
+        db.session.commit()
+        
+        task_result = export_all_reservations.delay(job_id, options)
+        
+        return jsonify({
+            'message': 'Reservation export started',
+            'job_id': job_id,
+            'task_id': task_result.id
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 #user seeing lots route
 
 @app.route('/api/parking-lots', methods=['GET'])
 def get_parking_lots():
     """Get parking lots for regular users"""
     try:
-        cache_key = "user_parking_lots"
-        cached_data = get_cache(cache_key)
+        variant = "user_summary" if is_summary_request() else "user"
         
-        if cached_data:
-            return jsonify(cached_data), 200
+        # Fragments cached for 2 minutes
+        return lot_listing_response(variant)
         
-        lots = ParkingLot.query.all()
-        lots_data = []
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def compact_ranges(values):
+    """Collapse a run of integers into [[start, count], ...] ranges"""
+    ranges = []
+    for value in values:
+        if ranges and value == ranges[-1][0] + ranges[-1][1]:
+            ranges[-1][1] += 1
+        else:
+            ranges.append([value, 1])
+    return ranges
+
+def encode_spot_map(lot_id, spots, spot_format):
+    """Encode spots (ordered by spot_number) as one status string or bitset.
+
+    Position i in the status string / bitset is the i-th spot; its id and
+    spot number are recovered by expanding id_ranges and spot_number_ranges,
+    which collapse to a single [offset, count] pair for an untouched lot.
+    The bitset is base64, MSB first, with a set bit meaning occupied."""
+    data = {
+        'lot_id': lot_id,
+        'format': spot_format,
+        'count': len(spots),
+        'id_ranges': compact_ranges(spot.id for spot in spots),
+        'spot_number_ranges': compact_ranges(spot.spot_number for spot in spots)
+    }
+    
+    if spot_format == 'bitset':
+        bits = bytearray((len(spots) + 7) // 8)
+        for i, spot in enumerate(spots):
+            if spot.status == 'O':
+                bits[i >> 3] |= 0x80 >> (i & 7)
+        data['occupied'] = base64.b64encode(bytes(bits)).decode('ascii')
+    else:
+        data['statuses'] = ''.join(spot.status for spot in spots)
+    return data
+
+@app.route('/api/parking-lots/<int:lot_id>/spots', methods=['GET'])
+def get_lot_spot_map(lot_id):
+    """Get the spot map of one lot (fetched when a lot is expanded).
+
+    ?format=compact returns a status string and ?format=bitset a base64
+    bitset instead of one dict per spot."""
+    try:
+        if not db.session.query(ParkingLot.id).filter_by(id=lot_id, deleted_at=None).first():
+            return jsonify({'error': 'Parking lot not found'}), 404
         
-        for lot in lots:
-            spots_data = []
-            for spot in lot.parking_spots:
-                spots_data.append({
-                    'id': spot.id,
-                    'spot_number': spot.spot_number,
-                    'status': spot.status
-                })
-            
-            lot_dict = {
-                'id': lot.id,
-                'prime_location_name': lot.prime_location_name,
-                'price': lot.price,
-                'address': lot.address,
-                'pin_code': lot.pin_code,
-                'number_of_spots': lot.number_of_spots,
-                'available_spots': len([s for s in lot.parking_spots if s.status == 'A']),
-                'occupied_spots': len([s for s in lot.parking_spots if s.status == 'O']),
-                'spots': spots_data 
-            }
-            lots_data.append(lot_dict)
+        spots = db.session.query(
+            ParkingSpot.id, ParkingSpot.spot_number, ParkingSpot.status
+        ).filter_by(lot_id=lot_id).order_by(ParkingSpot.spot_number).all()
         
-        # Cache for 2 minutes
-        set_cache(cache_key, lots_data, 120)
+        spot_format = request.args.get('format')
+        if spot_format in ('compact', 'bitset'):
+            return jsonify(encode_spot_map(lot_id, spots, spot_format)), 200
         
-        return jsonify(lots_data), 200
+        return jsonify({
+            'lot_id': lot_id,
+            'spots': [{
+                'id': spot.id,
+                'spot_number': spot.spot_number,
+                'status': spot.status
+            } for spot in spots]
+        }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1060,32 +2802,35 @@ def book_parking():
         if existing_reservation:
             return jsonify({'error': 'You already have an active booking'}), 400
         
-        # Find an available spot
-        available_spot = ParkingSpot.query.filter_by(
-            lot_id=lot_id,
-            status='A'
-        ).first()
+        # Claim an available spot (check and update happen in one statement)
+        available_spot = claim_available_spot(lot_id)
         
         if not available_spot:
+            db.session.rollback()
             return jsonify({'error': 'No available spots'}), 400
         
+        # IST wall-clock time, as reserve_parking stores it: release_parking
+        # reads parking_timestamp back as IST when it prices the stay
+        now = datetime.now(IST)
+        
         # Create reservation
         reservation = ReserveParkingSpot(
             spot_id=available_spot.id,
             user_id=session['user_id'],
             vehicle_number=vehicle_number,
-            parking_timestamp=datetime.utcnow(),
+            parking_timestamp=now,
             status='active'
         )
         
-        # Update spot status
-        available_spot.status = 'O'
-        
         db.session.add(reservation)
         db.session.commit()
         
         # Clear caches
-        delete_cache("admin_parking_lots", "user_parking_lots", f"user_dashboard_stats_{session['user_id']}")
+        invalidate_cache(
+            *lot_cache_keys(available_spot.lot_id),
+            "admin_dashboard_stats",
+            f"user_dashboard_stats_{session['user_id']}"
+        )
         
         return jsonify({
             'message': 'Booking successful',
@@ -1095,7 +2840,8 @@ def book_parking():
                 'spot_number': available_spot.spot_number,
                 'parking_lot': available_spot.parking_lot.prime_location_name,
                 'vehicle_number': vehicle_number,
-                'parking_timestamp': reservation.parking_timestamp.isoformat()
+                'parking_timestamp': reservation.parking_timestamp.isoformat(),
+                'parking_time': now.strftime('%d/%m/%Y, %I:%M:%S %p')
             }
         }), 201
         
@@ -1103,24 +2849,98 @@ def book_parking():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def parking_date_filters(date_from=None, date_to=None):
+    """Conditions for reservations parked between two YYYY-MM-DD dates
+    (both inclusive, either optional); raises ValueError on a bad date"""
+    filters = []
+    if date_from:
+        filters.append(ReserveParkingSpot.parking_timestamp >= datetime.strptime(date_from, '%Y-%m-%d'))
+    if date_to:
+        filters.append(
+            ReserveParkingSpot.parking_timestamp < datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1)
+        )
+    return filters
+
+def encode_reservation_cursor(reservation):
+    """Opaque keyset cursor pointing just past the given reservation"""
+    raw = f"{reservation.parking_timestamp.replace(tzinfo=None).isoformat()}|{reservation.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_reservation_cursor(cursor):
+    """Inverse of encode_reservation_cursor; raises ValueError when malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        timestamp, reservation_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(reservation_id)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
 @app.route('/api/my-reservations', methods=['GET'])
 def get_my_reservations():
+    """Newest-first reservation history for the logged in user.
+
+    Optional filters: ?status=active|completed and ?from=/?to= (YYYY-MM-DD,
+    inclusive, on the parking date). ?limit= returns one page; when more rows
+    follow, X-Next-Cursor holds the value to pass back as ?cursor=."""
     if not is_logged_in():
         return jsonify({'error': 'Please login first'}), 401
     
     try:
         user_id = session['user_id']
         
-        # Get reservations with parking lot information
-        reservations = db.session.query(ReserveParkingSpot).join(
+        query = db.session.query(ReserveParkingSpot).join(
             ParkingSpot
         ).join(
             ParkingLot
+        ).options(
+            db.contains_eager(ReserveParkingSpot.parking_spot).contains_eager(ParkingSpot.parking_lot)
         ).filter(
             ReserveParkingSpot.user_id == user_id
-        ).order_by(
-            ReserveParkingSpot.parking_timestamp.desc()
-        ).all()
+        )
+        
+        status = request.args.get('status')
+        if status:
+            if status not in ('active', 'completed'):
+                return jsonify({'error': 'status must be active or completed'}), 400
+            query = query.filter(ReserveParkingSpot.status == status)
+        
+        try:
+            query = query.filter(*parking_date_filters(request.args.get('from'), request.args.get('to')))
+        except ValueError:
+            return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+        
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                cursor_time, cursor_id = decode_reservation_cursor(cursor)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            query = query.filter(db.or_(
+                ReserveParkingSpot.parking_timestamp < cursor_time,
+                db.and_(
+                    ReserveParkingSpot.parking_timestamp == cursor_time,
+                    ReserveParkingSpot.id < cursor_id
+                )
+            ))
+        
+        query = query.order_by(
+            ReserveParkingSpot.parking_timestamp.desc(),
+            ReserveParkingSpot.id.desc()
+        )
+        
+        limit = request.args.get('limit', type=int)
+        if limit is None and cursor:
+            limit = 20
+        next_cursor = None
+        if limit is None:
+            reservations = query.all()
+        else:
+            limit = min(max(limit, 1), 100)
+            # One extra row tells us whether another page follows
+            reservations = query.limit(limit + 1).all()
+            if len(reservations) > limit:
+                reservations = reservations[:limit]
+                next_cursor = encode_reservation_cursor(reservations[-1])
         
         data = []
         for r in reservations:
@@ -1162,7 +2982,10 @@ def get_my_reservations():
             })
         
         print(f"✅ Found {len(data)} reservations for user {user_id}")
-        return jsonify(data), 200
+        response = jsonify(data)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
         
     except Exception as e:
         print(f"❌ Error in get_my_reservations: {str(e)}")
@@ -1206,21 +3029,38 @@ def release_parking(reservation_id):
         if duration.total_seconds() < 360:  # Less than 6 minutes
             parking_cost = max(1.0, parking_cost)
         
-        # Update reservation
-        reservation.leaving_timestamp = now_ist
-        reservation.parking_cost = round(parking_cost, 2)
-        reservation.status = 'completed'
+        # End the reservation with one conditional UPDATE: of concurrent
+        # releases (a double click, a retry) only one changes the row
+        spot = reservation.parking_spot
+        freed_lot_id, freed_spot = spot.lot_id, {spot.id: spot.spot_number}
+        ended = ReserveParkingSpot.query.filter_by(
+            id=reservation_id,
+            user_id=user_id,
+            status='active'
+        ).update({
+            'leaving_timestamp': now_ist,
+            'parking_cost': round(parking_cost, 2),
+            'status': 'completed'
+        }, synchronize_session=False)
+        
+        if ended != 1:
+            db.session.rollback()
+            return jsonify({'error': 'Reservation not found or already completed'}), 404
         
         # Update spot status
-        spot = reservation.parking_spot
-        spot.status = 'A'
+        freed = ParkingSpot.query.filter_by(id=spot.id, status='O').update(
+            {'status': 'A'}, synchronize_session=False
+        )
+        if freed == 1:
+            adjust_lot_counters(freed_lot_id, available=1, occupied=-1)
         
         db.session.commit()
         
+        push_free_spots(freed_lot_id, freed_spot)
+        
         # Clear caches
-        delete_cache(
-            "admin_parking_lots",
-            "user_parking_lots", 
+        invalidate_cache(
+            *lot_cache_keys(freed_lot_id),
             "admin_dashboard_stats",
             f"user_dashboard_stats_{user_id}"
         )
@@ -1243,26 +3083,37 @@ def release_parking(reservation_id):
         print(f"Release parking error: {str(e)}")  # Add logging
         return jsonify({'error': str(e)}), 500
 
+def build_admin_dashboard_stats():
+    """Build the admin dashboard stats in one statement: lot/spot totals come
+    from the maintained per-lot counters, the user count from a conditional
+    aggregate"""
+    total_users = db.session.query(
+        db.func.coalesce(db.func.sum(db.case((User.is_admin == False, 1), else_=0)), 0)
+    ).scalar_subquery()
+    
+    total_lots, available_spots, occupied_spots, total_users = db.session.query(
+        db.func.count(ParkingLot.id),
+        db.func.coalesce(db.func.sum(ParkingLot.available_spots), 0),
+        db.func.coalesce(db.func.sum(ParkingLot.occupied_spots), 0),
+        total_users
+    ).filter(ParkingLot.deleted_at.is_(None)).one()
+    
+    return {
+        'total_lots': total_lots,
+        'total_spots': available_spots + occupied_spots,
+        'available_spots': available_spots,
+        'occupied_spots': occupied_spots,
+        'total_users': total_users
+    }
+
 @app.route('/api/admin/dashboard-stats', methods=['GET'])
 def get_admin_dashboard_stats():
     if not is_logged_in() or not is_admin():
         return jsonify({'error': 'Admin access required'}), 403
     
     try:
-        # Simple version without caching
-        total_lots = ParkingLot.query.count()
-        total_spots = ParkingSpot.query.count()
-        available_spots = ParkingSpot.query.filter_by(status='A').count()
-        occupied_spots = ParkingSpot.query.filter_by(status='O').count()
-        total_users = User.query.filter_by(is_admin=False).count()
-        
-        stats = {
-            'total_lots': total_lots,
-            'total_spots': total_spots,
-            'available_spots': available_spots,
-            'occupied_spots': occupied_spots,
-            'total_users': total_users
-        }
+        # Cache for 5 minutes; every mutation clears this key
+        stats = get_or_build_cache("admin_dashboard_stats", build_admin_dashboard_stats, 300)
         
         return jsonify(stats), 200
         
@@ -1297,7 +3148,8 @@ def search_parking_lots():
             return jsonify([]), 200
         
         lots = ParkingLot.query.filter(
-            ParkingLot.prime_location_name.ilike(f'%{query}%')
+            ParkingLot.prime_location_name.ilike(f'%{query}%'),
+            ParkingLot.deleted_at.is_(None)
         ).all()
         
         results = []
@@ -1321,6 +3173,9 @@ def get_spot_details(spot_id):
     try:
         spot = ParkingSpot.query.get_or_404(spot_id)
 
+        if spot.parking_lot.deleted_at:
+            return jsonify({'error': 'Spot not found'}), 404
+
         spot_data = {
             'id': spot.id,
             'spot_number': spot.spot_number,
@@ -1378,21 +3233,37 @@ def delete_spot(spot_id):
     try:
         spot = ParkingSpot.query.get(spot_id)
         
-        if not spot:
+        if not spot or spot.parking_lot.deleted_at:
             return jsonify({'error': 'Spot not found'}), 404
         
-        if spot.status == 'O':
+        # Conditional deletes, as in remove_available_spots: a spot booked
+        # since it was read above is left alone with its reservation
+        lot_id = spot.lot_id
+        still_available = db.select(ParkingSpot.id).where(
+            ParkingSpot.id == spot_id,
+            ParkingSpot.status == 'A'
+        )
+        ReserveParkingSpot.query.filter(
+            ReserveParkingSpot.spot_id.in_(still_available)
+        ).delete(synchronize_session=False)
+        removed = ParkingSpot.query.filter_by(id=spot_id, status='A').delete(synchronize_session=False)
+        
+        if removed != 1:
+            db.session.rollback()
             return jsonify({'error': 'Cannot delete occupied spot'}), 400
         
         # Update parking lot spot count
-        parking_lot = spot.parking_lot
-        parking_lot.number_of_spots -= 1
+        ParkingLot.query.filter_by(id=lot_id).update({
+            ParkingLot.number_of_spots: ParkingLot.number_of_spots - 1
+        }, synchronize_session=False)
+        adjust_lot_counters(lot_id, available=-1)
         
-        db.session.delete(spot)
         db.session.commit()
         
+        prune_free_spots(lot_id, [spot_id])
+        
         # Clear caches
-        delete_cache("admin_parking_lots", "user_parking_lots", "admin_dashboard_stats")
+        invalidate_cache(*lot_cache_keys(lot_id), "admin_dashboard_stats")
         
         return jsonify({'message': 'Spot deleted successfully'}), 200
         
@@ -1413,7 +3284,7 @@ def update_parking_lot(lot_id):
         data = request.get_json()
         lot = ParkingLot.query.get(lot_id)
         
-        if not lot:
+        if not lot or lot.deleted_at:
             return jsonify({'error': 'Parking lot not found'}), 404
         
         # Update lot details
@@ -1424,35 +3295,32 @@ def update_parking_lot(lot_id):
         
         # Handle spot count changes
         new_spot_count = int(data.get('number_of_spots', lot.number_of_spots))
-        current_spot_count = len(lot.parking_spots)
+        current_spot_count = db.session.query(db.func.count(ParkingSpot.id)).filter(
+            ParkingSpot.lot_id == lot.id
+        ).scalar()
+        added_spot_numbers = {}
+        removed_spot_ids = []
+        removed_count = 0
         
         if new_spot_count > current_spot_count:
             # Add new spots
-            for i in range(current_spot_count + 1, new_spot_count + 1):
-                new_spot = ParkingSpot(
-                    lot_id=lot.id,
-                    spot_number=i,
-                    status='A'
-                )
-                db.session.add(new_spot)
+            added_spot_numbers = insert_spots(lot.id, current_spot_count + 1, new_spot_count)
         elif new_spot_count < current_spot_count:
             # Remove spots (only available ones)
-            spots_to_remove = ParkingSpot.query.filter_by(
-                lot_id=lot.id,
-                status='A'
-            ).order_by(ParkingSpot.spot_number.desc()).limit(
-                current_spot_count - new_spot_count
-            ).all()
-            
-            for spot in spots_to_remove:
-                db.session.delete(spot)
+            removed_spot_ids, removed_count = remove_available_spots(
+                lot.id, current_spot_count - new_spot_count
+            )
         
         lot.number_of_spots = new_spot_count
+        adjust_lot_counters(lot_id, available=len(added_spot_numbers) - removed_count)
         
         db.session.commit()
         
+        push_free_spots(lot_id, added_spot_numbers)
+        prune_free_spots(lot_id, removed_spot_ids)
+        
         # Clear caches
-        delete_cache("admin_parking_lots", "user_parking_lots", "admin_dashboard_stats")
+        invalidate_cache(*lot_cache_keys(lot_id), "admin_dashboard_stats")
         
         return jsonify({'message': 'Parking lot updated successfully'}), 200
         
@@ -1460,6 +3328,22 @@ def update_parking_lot(lot_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
     
+def build_user_dashboard_stats(user_id):
+    """Count and sum a user's reservations in the database"""
+    total_bookings, active_bookings, completed_bookings, total_spent = db.session.query(
+        db.func.count(ReserveParkingSpot.id),
+        db.func.coalesce(db.func.sum(db.case((ReserveParkingSpot.status == 'active', 1), else_=0)), 0),
+        db.func.coalesce(db.func.sum(db.case((ReserveParkingSpot.status == 'completed', 1), else_=0)), 0),
+        db.func.coalesce(db.func.sum(ReserveParkingSpot.parking_cost), 0)
+    ).filter(ReserveParkingSpot.user_id == user_id).one()
+    
+    return {
+        'total_bookings': total_bookings,
+        'active_bookings': active_bookings,
+        'completed_bookings': completed_bookings,
+        'total_spent': round(float(total_spent), 2)
+    }
+
 @app.route('/api/user-dashboard-stats', methods=['GET'])
 def get_user_dashboard_stats():
     """Get user dashboard statistics"""
@@ -1469,20 +3353,12 @@ def get_user_dashboard_stats():
     try:
         user_id = session['user_id']
         
-        # Get user's reservations
-        reservations = ReserveParkingSpot.query.filter_by(user_id=user_id).all()
-        
-        total_bookings = len(reservations)
-        active_bookings = len([r for r in reservations if r.status == 'active'])
-        completed_bookings = len([r for r in reservations if r.status == 'completed'])
-        total_spent = sum(r.parking_cost or 0 for r in reservations if r.parking_cost)
-        
-        stats = {
-            'total_bookings': total_bookings,
-            'active_bookings': active_bookings,
-            'completed_bookings': completed_bookings,
-            'total_spent': round(total_spent, 2)
-        }
+        # Cache for 5 minutes; booking, release, login and logout clear it
+        stats = get_or_build_cache(
+            f"user_dashboard_stats_{user_id}",
+            lambda: build_user_dashboard_stats(user_id),
+            300
+        )
         
         return jsonify(stats), 200
         
@@ -1490,9 +3366,87 @@ def get_user_dashboard_stats():
         return jsonify({'error': str(e)}), 500
 
 
+def delete_lot_rows(model, id_query, on_batch):
+    """Delete the rows of model whose ids id_query selects, LOT_DELETE_BATCH_SIZE
+    at a time; on_batch(count) is called before each batch is committed"""
+    batch_size = app.config["LOT_DELETE_BATCH_SIZE"]
+    while True:
+        ids = [row_id for (row_id,) in id_query.limit(batch_size)]
+        if not ids:
+            return
+        model.query.filter(model.id.in_(ids)).delete(synchronize_session=False)
+        on_batch(len(ids))
+        db.session.commit()
+
+def last_lot_deletion_job(lot_id):
+    """The most recent deletion job of a lot, or None"""
+    return ExportJob.query.filter(
+        ExportJob.job_type == 'lot_deletion',
+        ExportJob.id.like(f'lot\\_delete\\_{lot_id}\\_%', escape='\\')
+    ).order_by(ExportJob.created_at.desc()).first()
+
+@celery.task(name='app.purge_parking_lot')
+def purge_parking_lot(job_id, lot_id):
+    """Remove a deleted lot's reservations, then its spots, then the lot in
+    short batched transactions, updating the job's progress as it goes"""
+    with app.app_context():
+        job = None
+        try:
+            job = ExportJob.query.get(job_id)
+            if not job:
+                return "Lot deletion job not found"
+            
+            lot = ParkingLot.query.get(lot_id)
+            if not lot or not lot.deleted_at:
+                job.status = 'failed'
+                job.error_message = 'Parking lot is not marked for deletion'
+                db.session.commit()
+                return f"Lot {lot_id} is not marked for deletion"
+            
+            lot_spot_ids = db.select(ParkingSpot.id).where(ParkingSpot.lot_id == lot_id)
+            reservation_ids = db.session.query(ReserveParkingSpot.id).filter(
+                ReserveParkingSpot.spot_id.in_(lot_spot_ids)
+            )
+            spot_ids = db.session.query(ParkingSpot.id).filter(ParkingSpot.lot_id == lot_id)
+            
+            job.status = 'processing'
+            job.total_items = reservation_ids.count() + spot_ids.count()
+            job.processed_items = 0
+            db.session.commit()
+            
+            def record_batch(count):
+                job.processed_items += count
+            
+            delete_lot_rows(ReserveParkingSpot, reservation_ids, record_batch)
+            delete_lot_rows(ParkingSpot, spot_ids, record_batch)
+            
+            ParkingLot.query.filter_by(id=lot_id).delete(synchronize_session=False)
+            job.status = 'completed'
+            job.completed_at = datetime.utcnow()
+            db.session.commit()
+            
+            # Revenue charts still counted the purged history
+            invalidate_cache(*lot_cache_keys(lot_id), "admin_dashboard_stats")
+            
+            return f"Parking lot {lot_id} deleted: {job.processed_items} rows removed"
+            
+        except Exception as e:
+            logging.error(f"Parking lot purge failed: {e}")
+            db.session.rollback()
+            
+            if job:
+                job.status = 'failed'
+                job.error_message = str(e)[:500]
+                db.session.commit()
+            
+            return f"Parking lot purge failed: {str(e)}"
+
 @app.route('/api/admin/parking-lots/<int:lot_id>', methods=['DELETE'])
 def delete_parking_lot(lot_id):
-    """Delete parking lot"""
+    """Delete parking lot: the lot is hidden and closed to bookings right away,
+    its spots and reservation history are purged by a background job.
+
+    Deleting the lot again only queues a new purge once the last one failed."""
     if not is_logged_in() or not is_admin():
         return jsonify({'error': 'Admin access required'}), 403
     
@@ -1502,19 +3456,50 @@ def delete_parking_lot(lot_id):
         if not lot:
             return jsonify({'error': 'Parking lot not found'}), 404
         
-        # Check if any spots are occupied
-        occupied_spots = ParkingSpot.query.filter_by(lot_id=lot_id, status='O').count()
-        
-        if occupied_spots > 0:
-            return jsonify({'error': 'Cannot delete parking lot with occupied spots'}), 400
+        if lot.deleted_at:
+            last_job = last_lot_deletion_job(lot_id)
+            if last_job and last_job.status != 'failed':
+                return jsonify({
+                    'error': 'Parking lot is already being deleted',
+                    'job_id': last_job.id
+                }), 409
+        else:
+            # One conditional UPDATE, so neither a second delete nor a booking
+            # landing after the occupied-spot check can slip in between
+            occupied = db.exists().where(ParkingSpot.lot_id == lot_id, ParkingSpot.status == 'O')
+            marked = ParkingLot.query.filter_by(id=lot_id, deleted_at=None).filter(~occupied).update(
+                {ParkingLot.deleted_at: datetime.utcnow()}, synchronize_session=False
+            )
+            if not marked:
+                db.session.rollback()
+                if db.session.query(occupied).scalar():
+                    return jsonify({'error': 'Cannot delete parking lot with occupied spots'}), 400
+                return jsonify({'error': 'Parking lot is already being deleted'}), 409
         
-        db.session.delete(lot)
+        user_id = session['user_id']
+        job_id = f"lot_delete_{lot_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        
+        if not db.session.get(ExportJob, job_id):
+            db.session.add(ExportJob(
+                id=job_id,
+                user_id=user_id,
+                job_type='lot_deletion',
+                status='pending'
+            ))
         db.session.commit()
         
+        drop_free_spot_pool(lot_id)
+        
         # Clear caches
-        delete_cache("admin_parking_lots", "user_parking_lots", "admin_dashboard_stats")
+        invalidate_cache(LOT_IDS_CACHE_KEY, *lot_cache_keys(lot_id), "admin_dashboard_stats")
         
-        return jsonify({'message': 'Parking lot deleted successfully'}), 200
+        task_result = purge_parking_lot.delay(job_id, lot_id)
+        
+        return jsonify({
+            'message': 'Parking lot deleted, removing its spots in the background',
+            'job_id': job_id,
+            'task_id': task_result.id
+        }), 202
         
     except Exception as e:
         db.session.rollback()
@@ -1540,8 +3525,11 @@ def reserve_parking(spot_id):
             return jsonify({'error': 'You already have an active booking. Please release it first.'}), 400
         
         spot = ParkingSpot.query.get_or_404(spot_id)
-        if spot.status != 'A':
-            return jsonify({'error': 'Parking spot is not available'}), 400
+        
+        # Only one concurrent request can flip this spot from 'A' to 'O'
+        if not claim_spot(spot_id, spot.lot_id):
+            db.session.rollback()
+            return jsonify({'error': 'Parking spot is not available'}), 409
        
         now = datetime.now(IST)
         
@@ -1553,17 +3541,19 @@ def reserve_parking(spot_id):
             status='active'
         )
         
-        spot.status = 'O'
         db.session.add(reservation)
         db.session.commit()
         
+        prune_free_spots(spot.lot_id, [spot_id])
+        
         # Clear caches
-        delete_cache("admin_parking_lots", "user_parking_lots", f"user_dashboard_stats_{user_id}")
+        invalidate_cache(*lot_cache_keys(spot.lot_id), "admin_dashboard_stats", f"user_dashboard_stats_{user_id}")
         
         return jsonify({
             'message': 'Parking spot reserved successfully',
             'reservation_id': reservation.id,
             'spot_id': spot_id,
+            'spot_number': spot.spot_number,
             'parking_time': now.strftime('%d/%m/%Y, %I:%M:%S %p'),
             'vehicle_number': data['vehicle_number'],
             'lot_name': spot.parking_lot.prime_location_name,
@@ -1577,6 +3567,51 @@ def reserve_parking(spot_id):
 
 # gives charts data in admin dashboard
 
+def build_admin_charts_data():
+    """Build the admin chart series from the lot counters and one revenue GROUP BY"""
+    # Bar chart data - maintained counters, no spot rows loaded
+    lots = db.session.query(
+        ParkingLot.id,
+        ParkingLot.prime_location_name,
+        ParkingLot.available_spots,
+        ParkingLot.occupied_spots
+    ).filter(ParkingLot.deleted_at.is_(None)).order_by(ParkingLot.id).all()
+    
+    bar_labels = [lot.prime_location_name for lot in lots]
+    available_data = [lot.available_spots for lot in lots]
+    occupied_data = [lot.occupied_spots for lot in lots]
+    
+    # Pie chart data - Show actual revenue per lot, one GROUP BY for all lots
+    pie_labels = bar_labels if bar_labels else ['No Parking Lots']
+    
+    revenue_by_lot = dict(db.session.query(
+        ParkingSpot.lot_id,
+        db.func.sum(ReserveParkingSpot.parking_cost)
+    ).join(
+        ReserveParkingSpot, ReserveParkingSpot.spot_id == ParkingSpot.id
+    ).filter(
+        ReserveParkingSpot.status == 'completed',
+        ReserveParkingSpot.parking_cost.isnot(None)
+    ).group_by(ParkingSpot.lot_id).all())
+    
+    pie_revenue = [float(revenue_by_lot.get(lot.id) or 0) for lot in lots]
+
+    if not pie_revenue or all(rev == 0 for rev in pie_revenue):
+        pie_revenue = [0]
+        pie_labels = ['No Revenue Data']
+    
+    return {
+        'bar_chart': {
+            'labels': bar_labels,
+            'available': available_data,
+            'occupied': occupied_data
+        },
+        'pie_chart': {
+            'labels': pie_labels,
+            'revenue': pie_revenue
+        }
+    }
+
 @app.route('/api/admin/charts-data', methods=['GET'])
 def get_admin_charts_data():
     """Get data for admin charts"""
@@ -1584,59 +3619,8 @@ def get_admin_charts_data():
         return jsonify({'error': 'Admin access required'}), 403
     
     try:
-        # Get all parking lots
-        lots = ParkingLot.query.all()
-        
-        bar_labels = []
-        available_data = []
-        occupied_data = []
-        
-        for lot in lots:
-            bar_labels.append(lot.prime_location_name)
-            
-            available_count = 0
-            occupied_count = 0
-            
-            for spot in lot.parking_spots:
-                if spot.status == 'A':
-                    available_count += 1
-                elif spot.status == 'O':
-                    occupied_count += 1
-            
-            available_data.append(available_count)
-            occupied_data.append(occupied_count)
-        
-        # Pie chart data - Show actual revenue per lot
-        pie_labels = bar_labels if bar_labels else ['No Parking Lots']
-        pie_revenue = []
-
-        for lot in lots:
-            # Calculate total revenue for this lot
-            lot_revenue = db.session.query(db.func.sum(ReserveParkingSpot.parking_cost)).join(
-                ParkingSpot
-            ).filter(
-                ParkingSpot.lot_id == lot.id,
-                ReserveParkingSpot.status == 'completed',
-                ReserveParkingSpot.parking_cost.isnot(None)
-            ).scalar() or 0
-            
-            pie_revenue.append(float(lot_revenue))
-
-        if not pie_revenue or all(rev == 0 for rev in pie_revenue):
-            pie_revenue = [0]
-            pie_labels = ['No Revenue Data']
-        
-        charts_data = {
-            'bar_chart': {
-                'labels': bar_labels,
-                'available': available_data,
-                'occupied': occupied_data
-            },
-            'pie_chart': {
-                'labels': pie_labels,
-                'revenue': pie_revenue
-            }
-        }
+        # Cache for 5 minutes
+        charts_data = get_or_build_cache("admin_charts_data", build_admin_charts_data, 300)
         
         return jsonify(charts_data), 200
         
@@ -1658,6 +3642,41 @@ def get_admin_charts_data():
             }
         }), 200
 
+EXPORT_MIMETYPES = {'.gz': 'application/gzip', '.parquet': 'application/vnd.apache.parquet'}
+
+def export_download_url(job):
+    """Download link for a finished export, or None while there is no file"""
+    if job.status == 'completed' and job.file_path and os.path.isabs(job.file_path):
+        return f"/api/exports/{job.id}/download"
+    return None
+
+@app.route('/api/exports/<job_id>/download', methods=['GET'])
+def download_export(job_id):
+    """Serve a finished export file; Range requests get partial content"""
+    if not is_logged_in():
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    try:
+        job = ExportJob.query.filter_by(id=job_id, user_id=session['user_id']).first()
+        
+        if not job or not export_download_url(job):
+            return jsonify({'error': 'Export not found'}), 404
+        
+        if not os.path.isfile(job.file_path):
+            return jsonify({'error': 'Export file is no longer available'}), 410
+        
+        return send_file(
+            job.file_path,
+            mimetype=EXPORT_MIMETYPES.get(os.path.splitext(job.file_path)[1], 'application/octet-stream'),
+            as_attachment=True,
+            download_name=os.path.basename(job.file_path),
+            conditional=True,
+            max_age=0
+        )
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/export-status/<job_id>', methods=['GET'])
 def get_export_status(job_id):
     """Check the status of export job"""
@@ -1675,7 +3694,15 @@ def get_export_status(job_id):
             'status': job.status,
             'created_at': job.created_at.isoformat(),
             'completed_at': job.completed_at.isoformat() if job.completed_at else None,
-            'error_message': job.error_message
+            'error_message': job.error_message,
+            'download_url': export_download_url(job),
+            'total_items': job.total_items,
+            'processed_items': job.processed_items,
+            'failed_items': job.failed_items,
+            'progress': (
+                round(100 * (job.processed_items + job.failed_items) / job.total_items, 1)
+                if job.total_items else None
+            )
         }), 200
         
     except Exception as e:
@@ -1700,7 +3727,8 @@ def get_my_export_jobs():
                 'status': job.status,
                 'created_at': job.created_at.isoformat(),
                 'completed_at': job.completed_at.isoformat() if job.completed_at else None,
-                'error_message': job.error_message
+                'error_message': job.error_message,
+                'download_url': export_download_url(job)
             })
         
         return jsonify(jobs_data), 200
@@ -1709,17 +3737,33 @@ def get_my_export_jobs():
         return jsonify({'error': str(e)}), 500
 
 # Admin manual trigger routes
+def start_broadcast(kind):
+    """Create the ExportJob that tracks a manual broadcast and return its id"""
+    user_id = session['user_id']
+    job_id = f"{kind}_{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    
+    db.session.add(ExportJob(
+        id=job_id,
+        user_id=user_id,
+        job_type=f'{kind}_broadcast',
+        status='pending'
+    ))
+    db.session.commit()
+    return job_id
+
 @app.route('/api/admin/trigger-daily-reminders', methods=['POST'])
 def trigger_manual_daily_reminders():
     if not is_logged_in() or not is_admin():
         return jsonify({'error': 'Admin access required'}), 403
     
     try:
-        # Call manual function for immediate sending
-        result = send_daily_reminders_manual()
+        job_id = start_broadcast('daily_reminders')
+        task_result = dispatch_broadcast.delay(job_id, 'daily_reminders')
         return jsonify({
-            'message': result,
-            'status': 'sent_immediately',
+            'message': 'Daily reminders started. Track progress with the job id.',
+            'job_id': job_id,
+            'task_id': task_result.id,
+            'status': 'queued',
             'note': 'Automatic daily reminders continue running as scheduled'
         }), 200
     except Exception as e:
@@ -1731,17 +3775,92 @@ def trigger_manual_monthly_reports():
         return jsonify({'error': 'Admin access required'}), 403
     
     try:
-        # Call manual function for immediate sending
-        result = send_monthly_reports_manual()
+        job_id = start_broadcast('monthly_reports')
+        task_result = dispatch_broadcast.delay(job_id, 'monthly_reports')
         return jsonify({
-            'message': result,
-            'status': 'sent_immediately',
+            'message': 'Monthly reports started. Track progress with the job id.',
+            'job_id': job_id,
+            'task_id': task_result.id,
+            'status': 'queued',
             'note': 'Automatic monthly reports continue running as scheduled'
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+# Schema migrations. db.create_all() only creates missing tables, so columns
+# and indexes added to existing tables are applied here. Each step runs once
+# per database, in version order, and is recorded in schema_version; steps
+# must also be no-ops on a database create_all() has just built from the
+# current models. Append new steps; never renumber or edit applied ones.
+def add_integer_columns(table, *columns):
+    """ALTER TABLE ... ADD COLUMN for each missing counter column (default 0)"""
+    existing = {column['name'] for column in db.inspect(db.session.connection()).get_columns(table)}
+    for column in columns:
+        if column not in existing:
+            db.session.execute(db.text(
+                f"ALTER TABLE {table} ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"
+            ))
+
+def add_nullable_columns(model, *columns):
+    """ALTER TABLE ... ADD COLUMN for each missing nullable model column"""
+    table = model.__table__
+    connection = db.session.connection()
+    existing = {column['name'] for column in db.inspect(connection).get_columns(table.name)}
+    for column in columns:
+        if column not in existing:
+            column_type = table.c[column].type.compile(dialect=connection.dialect)
+            db.session.execute(db.text(f"ALTER TABLE {table.name} ADD COLUMN {column} {column_type}"))
+
+def create_indexes(model, *names):
+    """Create the model's named indexes if they do not exist yet"""
+    for index in model.__table__.indexes:
+        if index.name in names:
+            index.create(db.session.connection(), checkfirst=True)
+
+MIGRATIONS = [
+    (1, 'Lot availability counters',
+     lambda: add_integer_columns('parking_lot', 'available_spots', 'occupied_spots')),
+    (2, 'Reservation history indexes',
+     lambda: create_indexes(ReserveParkingSpot, 'ix_reservation_user_parked', 'ix_reservation_user_status')),
+    (3, 'Export job progress counters',
+     lambda: add_integer_columns('export_job', 'total_items', 'processed_items', 'failed_items')),
+    (4, 'Hot query indexes', lambda: (
+        create_indexes(ReserveParkingSpot, 'ix_reservation_spot_status', 'ix_reservation_parked_at'),
+        create_indexes(ParkingSpot, 'ix_spot_lot_status'),
+        create_indexes(User, 'ix_user_admin_last_login'),
+    )),
+    (5, 'Background lot deletion', lambda: add_nullable_columns(ParkingLot, 'deleted_at')),
+    (6, 'Reminder ledger delivery state', lambda: (
+        add_nullable_columns(ReminderLedger, 'status', 'retry_at', 'last_error'),
+        add_integer_columns('reminder_ledger', 'attempts'),
+        # Rows from before this migration were only kept for sent reminders
+        db.session.execute(db.text(
+            "UPDATE reminder_ledger SET status = 'sent', attempts = 1 WHERE status IS NULL"
+        )),
+    )),
+]
+
+def upgrade_schema():
+    """Apply pending MIGRATIONS to the database, oldest first (run after create_all)"""
+    applied = {version for (version,) in db.session.query(SchemaVersion.version)}
+    
+    for version, description, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        try:
+            migrate()
+            db.session.add(SchemaVersion(version=version, description=description))
+            db.session.commit()
+            print(f"Applied schema migration {version}: {description}")
+        except IntegrityError:
+            # Another process applied and recorded it first
+            db.session.rollback()
+        except Exception:
+            db.session.rollback()
+            raise
+
+
 # Initialize database and create admin user
 def create_admin_user():
     """Create default admin user"""
@@ -1764,5 +3883,8 @@ def create_admin_user():
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
+        upgrade_schema()
         create_admin_user()
+    reconcile_lot_counters()
+    reconcile_free_spot_pools()
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,57 @@
+"""Bulk spot creation and removal benchmark.
+
+For each lot size, times creating the lot through the admin API, growing it
+to twice the size and shrinking it back, with the statements each step sent
+to the database (batched inserts and set-based deletes, so they grow with
+size / SPOT_BATCH_SIZE rather than with the number of spots).
+
+    cd backend && python benchmarks/lot_spots.py [--sizes 1000 10000 100000]
+"""
+import argparse
+
+from support import admin_client, count_queries, create_lot, load_app, print_table, reset_database, timed
+
+
+def resize(client, lot_id, number_of_spots):
+    response = client.put(f'/api/admin/parking-lots/{lot_id}', json={'number_of_spots': number_of_spots})
+    if response.status_code != 200:
+        raise RuntimeError(f"Could not resize lot: {response.get_json()}")
+
+
+def spot_count(parking_app, lot_id):
+    with parking_app.app.app_context():
+        return parking_app.ParkingSpot.query.filter_by(lot_id=lot_id).count()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='lot sizes in spots')
+    args = parser.parse_args()
+
+    parking_app = load_app()
+    rows = []
+    for size in args.sizes:
+        reset_database(parking_app)
+        client = admin_client(parking_app)
+        row = [size]
+
+        with count_queries(parking_app) as statements:
+            lot_id, seconds = timed(create_lot, parking_app, size)
+        row += [f"{seconds:.2f}", len(statements)]
+
+        for target in (size * 2, size):
+            with count_queries(parking_app) as statements:
+                _, seconds = timed(resize, client, lot_id, target)
+            if spot_count(parking_app, lot_id) != target:
+                raise RuntimeError(f"Lot has {spot_count(parking_app, lot_id)} spots, expected {target}")
+            row += [f"{seconds:.2f}", len(statements)]
+
+        rows.append(row)
+        print(f"{size} spots: done", flush=True)
+
+    print()
+    print_table(['spots', 'create s', 'queries', 'grow x2 s', 'queries', 'shrink s', 'queries'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Monthly report pipeline benchmark.
+
+Builds last month's reports with iter_monthly_reports (the query stage of
+send_monthly_reports; no mail is sent) for a range of user and reservation
+counts. The statement count stays the same at every size and the runtime
+follows the number of reservations in the month, not users x queries.
+
+    cd backend && python benchmarks/monthly_reports.py [--scale 0.1]
+"""
+import argparse
+
+from support import add_users, count_queries, create_lot, load_app, print_table, reset_database, timed
+
+SPOTS = 200
+BATCH_SIZE = 10000
+
+# (users, reservations in the month): first the users grow with the
+# reservations fixed, then the reservations grow with the users fixed
+SIZES = [
+    (1000, 100000),
+    (10000, 100000),
+    (50000, 100000),
+    (10000, 25000),
+    (10000, 400000),
+]
+
+
+def seed(parking_app, users, reservations):
+    """users regular users sharing reservations spread evenly over last month"""
+    reset_database(parking_app)
+    lot_id = create_lot(parking_app, SPOTS, name='Benchmark Lot')
+    user_ids = add_users(parking_app, users)
+    start, end = parking_app.monthly_report_period()
+    step = (end - start) / reservations
+
+    with parking_app.app.app_context():
+        db, ReserveParkingSpot = parking_app.db, parking_app.ReserveParkingSpot
+        spot_ids = [spot_id for (spot_id,) in db.session.query(parking_app.ParkingSpot.id).filter_by(lot_id=lot_id)]
+        for first in range(0, reservations, BATCH_SIZE):
+            db.session.execute(ReserveParkingSpot.__table__.insert(), [{
+                'spot_id': spot_ids[number % SPOTS],
+                'user_id': user_ids[number % users],
+                'vehicle_number': 'KA01AB1234',
+                'parking_timestamp': start + step * number,
+                'leaving_timestamp': start + step * number + parking_app.timedelta(hours=1),
+                'parking_cost': 20.0,
+                'status': 'completed',
+            } for number in range(first, min(first + BATCH_SIZE, reservations))])
+        db.session.commit()
+
+
+def build_reports(parking_app):
+    """Run the report stage once; returns (reports, statements, seconds)"""
+    start, end = parking_app.monthly_report_period()
+    with parking_app.app.app_context(), count_queries(parking_app) as statements:
+        reports, seconds = timed(lambda: sum(1 for _ in parking_app.iter_monthly_reports(start, end)))
+    return reports, len(statements), seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scale', type=float, default=1.0, help='multiply every size by this factor')
+    args = parser.parse_args()
+
+    parking_app = load_app()
+    rows = []
+    for users, reservations in SIZES:
+        users, reservations = max(1, int(users * args.scale)), max(1, int(reservations * args.scale))
+        seed(parking_app, users, reservations)
+        reports, statements, seconds = build_reports(parking_app)
+        rows.append([
+            users, reservations, reports, statements,
+            f"{seconds:.2f}", f"{seconds / reservations * 1e6:.1f}"
+        ])
+        print(f"{users} users, {reservations} reservations: {seconds:.2f}s", flush=True)
+
+    print()
+    print_table(['users', 'reservations', 'reports', 'queries', 'seconds', 'us/reservation'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Shared setup for the benchmark scripts.
+
+The app is imported against BENCHMARK_DATABASE_URL, or a new SQLite file in
+a temporary directory. Every run drops and recreates the tables, so never
+point it at a database whose data you want to keep. The data and client
+helpers are the ones the test suite uses (tests/helpers.py)."""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from tests.helpers import (  # noqa: E402
+    add_users, admin_client, count_queries, create_lot, reset_database, user_client
+)
+
+
+def load_app():
+    """Import the app on a throwaway database with Celery tasks run inline"""
+    work_dir = tempfile.mkdtemp(prefix='urbanpark-bench-')
+    os.environ['DATABASE_URL'] = os.environ.get(
+        'BENCHMARK_DATABASE_URL', f"sqlite:///{os.path.join(work_dir, 'bench.db')}"
+    )
+    os.environ['EXPORT_DIR'] = os.path.join(work_dir, 'exports')
+    import app as parking_app
+
+    # Redis is optional (the app falls back to the database) and its
+    # connection errors would be logged on every call
+    logging.disable(logging.ERROR)
+    parking_app.celery.conf.task_always_eager = True
+    return parking_app
+
+
+def timed(func, *args, **kwargs):
+    """Call func and return (result, seconds taken)"""
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    for row in [headers, ['-' * width for width in widths], *rows]:
+        print('  '.join(str(value).rjust(width) for value, width in zip(row, widths)))
@@ -0,0 +1,112 @@
+"""Write concurrency benchmark for the database engine modes.
+
+Concurrent drivers book a spot and release it again through the API, each
+a write transaction, under every mode:
+
+  rollback journal  the pre-tuning SQLite defaults (DELETE journal,
+                    synchronous=FULL, small page cache)
+  wal, full sync    WAL with synchronous=FULL
+  wal               the current defaults (WAL, synchronous=NORMAL)
+  postgresql        the pooled PostgreSQL profile, with --postgresql-url
+
+Each mode runs in its own process, since the engine is configured at import.
+Pass --postgresql-url only for a scratch database: its tables are dropped.
+
+    cd backend && python benchmarks/write_concurrency.py [--drivers 200] [--threads 16]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+SQLITE_MODES = {
+    'rollback journal': {
+        'SQLITE_JOURNAL_MODE': 'DELETE',
+        'SQLITE_SYNCHRONOUS': 'FULL',
+        'SQLITE_CACHE_SIZE_KB': '2000',
+    },
+    'wal, full sync': {'SQLITE_SYNCHRONOUS': 'FULL'},
+    'wal': {},
+}
+
+
+def drive(client, lot_id):
+    """Book and release one spot; returns (status codes, whether a request
+    failed on a locked database)"""
+    responses = [client.post('/api/book-parking', json={'lot_id': lot_id, 'vehicle_number': 'KA01AB1234'})]
+    if responses[0].status_code == 201:
+        reservation_id = responses[0].get_json()['reservation']['id']
+        responses.append(client.post(f'/api/release-parking/{reservation_id}'))
+    statuses = [response.status_code for response in responses]
+    return statuses, any('locked' in response.get_data(as_text=True) for response in responses)
+
+
+def run_worker(drivers, threads):
+    """Run the workload in this process and print the result as JSON"""
+    from support import add_users, create_lot, load_app, reset_database, timed, user_client
+
+    parking_app = load_app()
+    reset_database(parking_app)
+    lot_id = create_lot(parking_app, drivers)
+    clients = [user_client(parking_app, user_id) for user_id in add_users(parking_app, drivers)]
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results, seconds = timed(lambda: list(pool.map(lambda client: drive(client, lot_id), clients)))
+
+    statuses = [status for result_statuses, _ in results for status in result_statuses]
+    print(json.dumps({
+        'writes': statuses.count(200) + statuses.count(201),
+        'failed': sum(status >= 500 for status in statuses),
+        'locked': sum(locked for _, locked in results),
+        'seconds': seconds,
+    }))
+
+
+def run_mode(settings, drivers, threads, database_url=None):
+    """Run the workload in a child process configured with settings"""
+    env = {key: value for key, value in os.environ.items() if key != 'BENCHMARK_DATABASE_URL'}
+    env.update(settings)
+    if database_url:
+        env['BENCHMARK_DATABASE_URL'] = database_url
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', '--drivers', str(drivers), '--threads', str(threads)],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--drivers', type=int, default=200, help='drivers booking and releasing once each')
+    parser.add_argument('--threads', type=int, default=16, help='concurrent requests')
+    parser.add_argument('--postgresql-url', help='also run against this scratch PostgreSQL database')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.drivers, args.threads)
+        return
+
+    from support import print_table
+
+    modes = [(name, settings, None) for name, settings in SQLITE_MODES.items()]
+    if args.postgresql_url:
+        modes.append(('postgresql', {}, args.postgresql_url))
+
+    rows = []
+    for name, settings, database_url in modes:
+        result = run_mode(settings, args.drivers, args.threads, database_url)
+        rows.append([
+            name, result['writes'], result['failed'], result['locked'],
+            f"{result['seconds']:.2f}", f"{result['writes'] / result['seconds']:.0f}"
+        ])
+        print(f"{name}: {result['seconds']:.2f}s", flush=True)
+
+    print()
+    print_table(['mode', 'writes', 'failed', 'locked', 'seconds', 'writes/s'], rows)
+
+
+if __name__ == '__main__':
+    main()
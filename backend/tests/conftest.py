@@ -0,0 +1,70 @@
+"""Shared test setup: the app is imported against a throwaway database.
+
+Set TEST_DATABASE_URL to run the suite against another engine (never point
+it at a database whose data you want to keep)."""
+import os
+import sys
+import tempfile
+
+import pytest
+
+import helpers
+
+TEST_DIR = tempfile.mkdtemp(prefix='urbanpark-tests-')
+os.environ['DATABASE_URL'] = os.environ.get(
+    'TEST_DATABASE_URL', f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}"
+)
+os.environ['EXPORT_DIR'] = os.path.join(TEST_DIR, 'exports')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# One in-memory Redis for the whole run: the local cache's invalidation
+# listener stays subscribed to it across tests
+_fake_redis = None
+
+
+@pytest.fixture
+def parking_app(monkeypatch):
+    """The app module on an empty, fully migrated database with the default
+    admin, an empty in-memory Redis and Celery tasks run inline"""
+    global _fake_redis
+    fakeredis = pytest.importorskip('fakeredis')
+    import app as parking_app
+    
+    if _fake_redis is None:
+        _fake_redis = fakeredis.FakeRedis()
+    _fake_redis.flushall()
+    monkeypatch.setattr(parking_app, 'redis_client', parking_app.RedisCircuitBreaker(_fake_redis))
+    monkeypatch.setattr(parking_app, 'redis_pubsub_client', _fake_redis)
+    monkeypatch.setitem(parking_app.celery.conf, 'task_always_eager', True)
+    helpers.reset_database(parking_app)
+    
+    yield parking_app
+    
+    with parking_app.app.app_context():
+        parking_app.db.session.remove()
+        parking_app.db.drop_all()
+
+
+@pytest.fixture
+def admin_client(parking_app):
+    return helpers.admin_client(parking_app)
+
+
+@pytest.fixture
+def add_users(parking_app):
+    """Insert count regular users in one go and return their ids"""
+    return lambda count: helpers.add_users(parking_app, count)
+
+
+@pytest.fixture
+def user_client(parking_app):
+    """Test client logged in as the given user id"""
+    return lambda user_id: helpers.user_client(parking_app, user_id)
+
+
+@pytest.fixture
+def create_lot(parking_app, admin_client):
+    """Create a parking lot through the admin API and return its id"""
+    def create(number_of_spots, name='Test Lot', price=20):
+        return helpers.create_lot(parking_app, number_of_spots, name, price, client=admin_client)
+    return create
@@ -0,0 +1,82 @@
+"""Data and client helpers shared by the test fixtures and the benchmark
+scripts. Each takes the imported app module as its first argument."""
+import contextlib
+import io
+
+from sqlalchemy import event
+
+
+def reset_database(parking_app):
+    """Empty, fully migrated schema with the default admin"""
+    with parking_app.app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+        parking_app.db.session.remove()
+        parking_app.db.drop_all()
+        parking_app.db.create_all()
+        parking_app.upgrade_schema()
+        parking_app.create_admin_user()
+    parking_app.local_cache.clear()
+
+
+def admin_client(parking_app):
+    client = parking_app.app.test_client()
+    client.post('/api/login', json={'email': 'admin@parking.com', 'password': 'admin123'})
+    return client
+
+
+def user_client(parking_app, user_id):
+    """Test client logged in as the given user id"""
+    client = parking_app.app.test_client()
+    with client.session_transaction() as flask_session:
+        flask_session['user_id'] = user_id
+    return client
+
+
+def add_users(parking_app, count, batch_size=10000):
+    """Insert count regular users in bulk and return their ids"""
+    with parking_app.app.app_context():
+        db, User = parking_app.db, parking_app.User
+        first_id = (db.session.query(db.func.max(User.id)).scalar() or 0) + 1
+        user_ids = list(range(first_id, first_id + count))
+        for start in range(0, count, batch_size):
+            db.session.execute(User.__table__.insert(), [{
+                'email': f'driver{user_id}@urbanpark.test',
+                'password_hash': 'unused',
+                'full_name': f'Driver {user_id}',
+                'phone': '9000000000',
+                'address': 'Test Street',
+                'pin_code': '560001',
+                'is_admin': False,
+                'created_at': parking_app.datetime.utcnow(),
+            } for user_id in user_ids[start:start + batch_size]])
+        db.session.commit()
+        return user_ids
+
+
+def create_lot(parking_app, number_of_spots, name='Test Lot', price=20, client=None):
+    """Create a parking lot through the admin API and return its id"""
+    response = (client or admin_client(parking_app)).post('/api/admin/parking-lots', json={
+        'prime_location_name': name,
+        'price': price,
+        'address': 'Test Street',
+        'pin_code': '560001',
+        'number_of_spots': number_of_spots,
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['lot']['id']
+
+
+@contextlib.contextmanager
+def count_queries(parking_app):
+    """Collect every statement sent to the database while the block runs"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with parking_app.app.app_context():
+        engine = parking_app.db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
@@ -0,0 +1,89 @@
+"""Gate rush: hundreds of parallel bookings against one lot"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BOOKINGS = 300
+SPOTS = 100
+THREADS = 32
+
+
+def fire(requests, threads=THREADS):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        responses = list(pool.map(lambda send: send(), requests))
+    return responses, time.perf_counter() - started
+
+
+def active_reservations_per_spot(parking_app, lot_id):
+    with parking_app.app.app_context():
+        ReserveParkingSpot, ParkingSpot = parking_app.ReserveParkingSpot, parking_app.ParkingSpot
+        return dict(parking_app.db.session.query(
+            ReserveParkingSpot.spot_id, parking_app.db.func.count(ReserveParkingSpot.id)
+        ).join(ParkingSpot, ReserveParkingSpot.spot_id == ParkingSpot.id).filter(
+            ParkingSpot.lot_id == lot_id,
+            ReserveParkingSpot.status == 'active'
+        ).group_by(ReserveParkingSpot.spot_id).all())
+
+
+def test_parallel_bookings_never_share_a_spot(parking_app, add_users, user_client, create_lot, record_property):
+    lot_id = create_lot(SPOTS)
+    clients = [user_client(user_id) for user_id in add_users(BOOKINGS)]
+    
+    responses, elapsed = fire([
+        lambda client=client: client.post('/api/book-parking', json={'lot_id': lot_id, 'vehicle_number': 'KA01AB1234'})
+        for client in clients
+    ])
+    record_property('bookings_per_second', round(BOOKINGS / elapsed))
+    
+    statuses = [response.status_code for response in responses]
+    assert statuses.count(201) == SPOTS
+    assert statuses.count(400) == BOOKINGS - SPOTS
+    assert all(response.get_json()['error'] == 'No available spots' for response in responses if response.status_code == 400)
+    
+    won_spots = [response.get_json()['reservation']['spot_id'] for response in responses if response.status_code == 201]
+    assert len(set(won_spots)) == SPOTS
+    
+    per_spot = active_reservations_per_spot(parking_app, lot_id)
+    assert len(per_spot) == SPOTS
+    assert set(per_spot.values()) == {1}
+    
+    with parking_app.app.app_context():
+        lot = parking_app.db.session.get(parking_app.ParkingLot, lot_id)
+        assert (lot.available_spots, lot.occupied_spots) == (0, SPOTS)
+        assert parking_app.ParkingSpot.query.filter_by(lot_id=lot_id, status='A').count() == 0
+
+
+def test_parallel_reservations_of_one_spot_have_one_winner(parking_app, add_users, user_client, create_lot):
+    lot_id = create_lot(5)
+    with parking_app.app.app_context():
+        spot_id = parking_app.ParkingSpot.query.filter_by(lot_id=lot_id, spot_number=3).one().id
+    clients = [user_client(user_id) for user_id in add_users(100)]
+    
+    responses, _ = fire([
+        lambda client=client: client.post(f'/api/reserve-parking/{spot_id}', json={'vehicle_number': 'KA01AB1234'})
+        for client in clients
+    ])
+    
+    statuses = [response.status_code for response in responses]
+    assert statuses.count(200) == 1
+    assert statuses.count(409) == 99
+    assert active_reservations_per_spot(parking_app, lot_id) == {spot_id: 1}
+
+
+def test_throughput_stays_stable_as_the_lot_fills(parking_app, add_users, user_client, create_lot, record_property):
+    lot_id = create_lot(SPOTS)
+    clients = [user_client(user_id) for user_id in add_users(BOOKINGS)]
+    
+    rates = []
+    for start in range(0, BOOKINGS, SPOTS):
+        wave = clients[start:start + SPOTS]
+        responses, elapsed = fire([
+            lambda client=client: client.post('/api/book-parking', json={'lot_id': lot_id, 'vehicle_number': 'KA01AB1234'})
+            for client in wave
+        ])
+        assert all(response.status_code in (201, 400) for response in responses)
+        rates.append(len(wave) / elapsed)
+    
+    record_property('bookings_per_second_by_wave', [round(rate) for rate in rates])
+    # Rejections once the lot is full must not be slower than the bookings that filled it
+    assert min(rates[1:]) > rates[0] / 3
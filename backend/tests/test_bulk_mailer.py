@@ -0,0 +1,157 @@
+"""BulkMailer against a local aiosmtpd server: session reuse, throughput,
+and which errors reopen the session"""
+import smtplib
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from flask import Flask
+from flask_mail import Mail, Message
+
+import app as parking_app
+
+aiosmtpd_controller = pytest.importorskip('aiosmtpd.controller')
+
+
+class RecordingHandler:
+    """Accepts every message except those for refused@ addresses and notes
+    which client connection (peer) delivered it"""
+
+    def __init__(self):
+        self.messages = []
+        self.peers = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith('refused@'):
+            return '550 5.1.1 Mailbox unavailable'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope.rcpt_tos[0])
+        if session.peer not in self.peers:
+            self.peers.append(session.peer)
+        return '250 Message accepted for delivery'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = aiosmtpd_controller.Controller(handler, hostname='127.0.0.1', port=free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+@pytest.fixture
+def mail(smtp_server):
+    controller, _ = smtp_server
+    mail_app = Flask('bulk_mailer_test')
+    mail_app.config.update(
+        MAIL_SERVER=controller.hostname,
+        MAIL_PORT=controller.port,
+        MAIL_USE_TLS=False,
+        MAIL_DEFAULT_SENDER='noreply@urbanpark.test',
+    )
+    with mail_app.app_context():
+        yield Mail(mail_app)
+
+
+def message(recipient):
+    return Message(subject='Reminder', recipients=[recipient], body='Book your spot today')
+
+
+def test_batches_share_one_session(mail, smtp_server):
+    _, handler = smtp_server
+    
+    with parking_app.BulkMailer(mail, batch_size=100) as mailer:
+        for index in range(250):
+            mailer.send(message(f'user{index}@urbanpark.test'))
+    
+    assert len(handler.messages) == 250
+    assert len(handler.peers) == 3
+
+
+def test_throughput_against_one_session_per_message(mail, smtp_server, record_property):
+    _, handler = smtp_server
+    count = 200
+    
+    started = time.perf_counter()
+    for index in range(count):
+        mail.send(message(f'single{index}@urbanpark.test'))
+    single_rate = count / (time.perf_counter() - started)
+    single_sessions = len(handler.peers)
+    
+    started = time.perf_counter()
+    with parking_app.BulkMailer(mail, batch_size=100) as mailer:
+        for index in range(count):
+            mailer.send(message(f'bulk{index}@urbanpark.test'))
+    bulk_rate = count / (time.perf_counter() - started)
+    
+    record_property('messages_per_second_one_session_each', round(single_rate))
+    record_property('messages_per_second_bulk', round(bulk_rate))
+    
+    assert len(handler.messages) == 2 * count
+    assert single_sessions == count
+    assert len(handler.peers) - single_sessions == 2
+
+
+def test_refused_recipient_keeps_the_session(mail, smtp_server):
+    _, handler = smtp_server
+    
+    with parking_app.BulkMailer(mail, batch_size=100) as mailer:
+        mailer.send(message('first@urbanpark.test'))
+        with pytest.raises(smtplib.SMTPRecipientsRefused):
+            mailer.send(message('refused@urbanpark.test'))
+        mailer.send(message('last@urbanpark.test'))
+    
+    assert handler.messages == ['first@urbanpark.test', 'last@urbanpark.test']
+    assert len(handler.peers) == 1
+
+
+def test_dropped_session_is_reopened_and_retried(mail, smtp_server):
+    _, handler = smtp_server
+    
+    with parking_app.BulkMailer(mail, batch_size=100) as mailer:
+        mailer.send(message('first@urbanpark.test'))
+        mailer._connection.host.close()
+        mailer.send(message('second@urbanpark.test'))
+    
+    assert handler.messages == ['first@urbanpark.test', 'second@urbanpark.test']
+    assert len(handler.peers) == 2
+
+
+def test_sends_are_throttled(mail):
+    with parking_app.BulkMailer(mail, batch_size=100, max_per_second=50) as mailer:
+        started = time.monotonic()
+        for index in range(11):
+            mailer.send(message(f'user{index}@urbanpark.test'))
+        elapsed = time.monotonic() - started
+    
+    assert elapsed >= 0.2
+
+
+def test_rate_is_shared_by_mailers_with_one_key(mail, monkeypatch):
+    fakeredis = pytest.importorskip('fakeredis')
+    monkeypatch.setattr(parking_app, 'redis_client', parking_app.RedisCircuitBreaker(fakeredis.FakeRedis()))
+    
+    def send_six(worker):
+        # One mailer per worker, as each broadcast chunk task builds its own
+        with mail.app.app_context(), parking_app.BulkMailer(mail, batch_size=100, max_per_second=50, rate_key='mail_rate_test') as mailer:
+            for index in range(6):
+                mailer.send(message(f'worker{worker}-{index}@urbanpark.test'))
+    
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(send_six, range(2)))
+    elapsed = time.monotonic() - started
+    
+    # 12 sends at 50/s take at least 11 intervals of 20ms, not the 5 of each mailer alone
+    assert elapsed >= 0.2
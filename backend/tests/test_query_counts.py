@@ -0,0 +1,102 @@
+"""Reservation history reads must not issue one query per reservation"""
+from helpers import count_queries
+
+FEW = 10
+MANY = 1000
+
+
+def add_reservations(parking_app, user_id, spot_id, count, start=None):
+    """Insert count completed reservations for user_id, one hour apart"""
+    with parking_app.app.app_context():
+        start = start or parking_app.datetime.utcnow() - parking_app.timedelta(hours=count + 1)
+        parking_app.db.session.execute(parking_app.ReserveParkingSpot.__table__.insert(), [{
+            'spot_id': spot_id,
+            'user_id': user_id,
+            'vehicle_number': 'KA01AB1234',
+            'parking_timestamp': start + parking_app.timedelta(hours=hour),
+            'leaving_timestamp': start + parking_app.timedelta(hours=hour, minutes=30),
+            'parking_cost': 10.0,
+            'status': 'completed',
+        } for hour in range(count)])
+        parking_app.db.session.commit()
+
+
+def first_spot_id(parking_app, lot_id):
+    with parking_app.app.app_context():
+        return parking_app.ParkingSpot.query.filter_by(lot_id=lot_id).order_by(parking_app.ParkingSpot.id).first().id
+
+
+def users_with_history(parking_app, add_users, create_lot, start=None):
+    """Two users sharing one lot: one with FEW reservations, one with MANY"""
+    spot_id = first_spot_id(parking_app, create_lot(2))
+    light_user, heavy_user = add_users(2)
+    add_reservations(parking_app, light_user, spot_id, FEW, start)
+    add_reservations(parking_app, heavy_user, spot_id, MANY, start)
+    return light_user, heavy_user
+
+
+def test_my_reservations_query_count_is_constant(parking_app, add_users, user_client, create_lot):
+    light_user, heavy_user = users_with_history(parking_app, add_users, create_lot)
+
+    counts = {}
+    for user_id, expected in ((light_user, FEW), (heavy_user, MANY)):
+        client = user_client(user_id)
+        with count_queries(parking_app) as statements:
+            response = client.get('/api/my-reservations')
+        assert response.status_code == 200
+        assert len(response.get_json()) == expected
+        counts[user_id] = len(statements)
+
+    assert 0 < counts[light_user] == counts[heavy_user]
+
+
+def test_my_reservations_page_query_count_is_constant(parking_app, add_users, user_client, create_lot):
+    light_user, heavy_user = users_with_history(parking_app, add_users, create_lot)
+
+    counts = {}
+    for user_id in (light_user, heavy_user):
+        client = user_client(user_id)
+        with count_queries(parking_app) as statements:
+            response = client.get('/api/my-reservations?limit=100')
+        assert response.status_code == 200
+        counts[user_id] = len(statements)
+
+    assert 0 < counts[light_user] == counts[heavy_user]
+
+
+def test_csv_export_query_count_is_constant(parking_app, add_users, create_lot, monkeypatch):
+    light_user, heavy_user = users_with_history(parking_app, add_users, create_lot)
+    monkeypatch.setattr(parking_app.mail, 'send', lambda message: None)
+
+    counts = {}
+    for user_id in (light_user, heavy_user):
+        job_id = f'export-{user_id}'
+        with parking_app.app.app_context():
+            parking_app.db.session.add(parking_app.ExportJob(id=job_id, user_id=user_id, job_type='csv_export'))
+            parking_app.db.session.commit()
+
+        with count_queries(parking_app) as statements:
+            parking_app.export_user_data_csv(user_id, job_id)
+        counts[user_id] = len(statements)
+
+        with parking_app.app.app_context():
+            assert parking_app.ExportJob.query.get(job_id).status == 'completed'
+
+    assert 0 < counts[light_user] == counts[heavy_user]
+
+
+def test_monthly_report_query_count_is_constant(parking_app, add_users, create_lot):
+    start, end = parking_app.monthly_report_period()
+    light_user, heavy_user = users_with_history(parking_app, add_users, create_lot, start=start)
+
+    counts = {}
+    for user_id in (light_user, heavy_user):
+        with parking_app.app.app_context():
+            with count_queries(parking_app) as statements:
+                reports = list(parking_app.iter_monthly_reports(
+                    start, end, first_user_id=user_id, last_user_id=user_id
+                ))
+        assert len(reports) == 1
+        counts[user_id] = len(statements)
+
+    assert 0 < counts[light_user] == counts[heavy_user]
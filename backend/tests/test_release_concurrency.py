@@ -0,0 +1,38 @@
+"""Repeated releases of one reservation: a double click or a client retry"""
+from test_booking_concurrency import fire
+
+RELEASES = 20
+SPOTS = 10
+DRIVERS = 5
+
+
+def lot_counters(parking_app, lot_id):
+    with parking_app.app.app_context():
+        lot = parking_app.db.session.get(parking_app.ParkingLot, lot_id)
+        return lot.available_spots, lot.occupied_spots
+
+
+def test_parallel_releases_free_the_spot_once(parking_app, add_users, user_client, create_lot):
+    lot_id = create_lot(SPOTS)
+    reservations = {}
+    for user_id in add_users(DRIVERS):
+        response = user_client(user_id).post('/api/book-parking', json={'lot_id': lot_id, 'vehicle_number': 'KA01AB1234'})
+        assert response.status_code == 201
+        reservations[user_id] = response.get_json()['reservation']['id']
+    assert lot_counters(parking_app, lot_id) == (SPOTS - DRIVERS, DRIVERS)
+
+    clients = {user_id: user_client(user_id) for user_id in reservations}
+    responses, _ = fire([
+        lambda user_id=user_id: clients[user_id].post(f'/api/release-parking/{reservations[user_id]}')
+        for user_id in reservations
+        for _ in range(RELEASES)
+    ])
+
+    statuses = [response.status_code for response in responses]
+    assert statuses.count(200) == DRIVERS
+    assert statuses.count(404) == DRIVERS * (RELEASES - 1)
+    assert lot_counters(parking_app, lot_id) == (SPOTS, 0)
+
+    with parking_app.app.app_context():
+        assert parking_app.ParkingSpot.query.filter_by(lot_id=lot_id, status='A').count() == SPOTS
+        assert parking_app.ReserveParkingSpot.query.filter_by(status='completed').count() == DRIVERS
@@ -0,0 +1,121 @@
+"""Versioned migrations: hot query indexes on upgraded databases, idempotent reruns"""
+from datetime import datetime, timedelta
+
+import pytest
+
+HOT_INDEXES = (
+    'ix_reservation_user_parked',
+    'ix_reservation_user_status',
+    'ix_reservation_spot_status',
+    'ix_reservation_parked_at',
+    'ix_spot_lot_status',
+    'ix_user_admin_last_login',
+)
+
+
+def hot_queries(parking_app):
+    """The hot lookups, built the way app.py builds them, keyed by the index each should use"""
+    db, User, ParkingSpot, ReserveParkingSpot = (
+        parking_app.db, parking_app.User, parking_app.ParkingSpot, parking_app.ReserveParkingSpot
+    )
+    week_ago = datetime.utcnow() - timedelta(days=7)
+    start, end = parking_app.monthly_report_period()
+    return {
+        # /api/my-reservations history, newest first
+        'ix_reservation_user_parked': db.session.query(ReserveParkingSpot.id).filter(
+            ReserveParkingSpot.user_id == 2
+        ).order_by(ReserveParkingSpot.parking_timestamp.desc(), ReserveParkingSpot.id.desc()),
+        # "Does this user already have an active booking"
+        'ix_reservation_user_status': db.session.query(ReserveParkingSpot.id).filter_by(
+            user_id=2, status='active'
+        ),
+        # Active booking of a spot (release, delete_spot, spot details)
+        'ix_reservation_spot_status': db.session.query(ReserveParkingSpot.id).filter_by(
+            spot_id=1, status='active'
+        ),
+        # Monthly report period
+        'ix_reservation_parked_at': db.session.query(ReserveParkingSpot.id).filter(
+            ReserveParkingSpot.parking_timestamp >= start,
+            ReserveParkingSpot.parking_timestamp < end
+        ),
+        # book_parking's database fallback, as in lowest_free_spot_id
+        'ix_spot_lot_status': db.session.query(ParkingSpot.id).filter_by(
+            lot_id=1, status='A'
+        ).order_by(ParkingSpot.spot_number).limit(1),
+        # Daily reminders: regular users not seen for a week
+        'ix_user_admin_last_login': db.session.query(User.id).filter(
+            User.is_admin == False,
+            db.or_(User.last_login < week_ago, User.last_login == None)
+        ),
+    }
+
+
+def query_plan(parking_app, query):
+    """SQLite's EXPLAIN QUERY PLAN detail lines for an ORM query"""
+    db = parking_app.db
+    # EXPLAIN plans against the connection's cached schema without checking
+    # for changes, so pooled connections could still see dropped indexes
+    db.session.remove()
+    db.engine.dispose()
+    sql = query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    return [row[-1] for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}'))]
+
+
+def uses_index(plan, index_name):
+    return any(f'INDEX {index_name}' in detail for detail in plan)
+
+
+@pytest.fixture
+def legacy_database(parking_app):
+    """The test database rolled back to a pre-migration parking.db: none of
+    the hot indexes and no recorded schema versions"""
+    with parking_app.app.app_context():
+        if parking_app.db.engine.dialect.name != 'sqlite':
+            pytest.skip('EXPLAIN QUERY PLAN checks are SQLite specific')
+        for index_name in HOT_INDEXES:
+            parking_app.db.session.execute(parking_app.db.text(f'DROP INDEX {index_name}'))
+        parking_app.SchemaVersion.query.delete()
+        parking_app.db.session.commit()
+    return parking_app
+
+
+def test_hot_queries_use_their_indexes_after_migration(legacy_database):
+    parking_app = legacy_database
+    with parking_app.app.app_context():
+        for index_name, query in hot_queries(parking_app).items():
+            plan = query_plan(parking_app, query)
+            assert not uses_index(plan, index_name), (index_name, plan)
+
+        parking_app.upgrade_schema()
+
+        for index_name, query in hot_queries(parking_app).items():
+            plan = query_plan(parking_app, query)
+            assert uses_index(plan, index_name), (index_name, plan)
+
+
+def test_upgrade_records_every_migration_once(legacy_database):
+    parking_app = legacy_database
+    with parking_app.app.app_context():
+        parking_app.upgrade_schema()
+        versions = [version for (version,) in parking_app.db.session.query(parking_app.SchemaVersion.version)]
+        assert sorted(versions) == [version for version, _, _ in parking_app.MIGRATIONS]
+
+
+def test_second_upgrade_is_a_no_op(parking_app, monkeypatch, capsys):
+    with parking_app.app.app_context():
+        versions_before = parking_app.db.session.query(parking_app.SchemaVersion.version).count()
+        indexes_before = parking_app.db.inspect(parking_app.db.engine).get_indexes('reserve_parking_spot')
+        capsys.readouterr()
+
+        def already_applied():
+            raise AssertionError('an applied migration ran again')
+
+        monkeypatch.setattr(parking_app, 'MIGRATIONS', [
+            (version, description, already_applied)
+            for version, description, _ in parking_app.MIGRATIONS
+        ])
+        parking_app.upgrade_schema()
+
+        assert capsys.readouterr().out == ''
+        assert parking_app.db.session.query(parking_app.SchemaVersion.version).count() == versions_before
+        assert parking_app.db.inspect(parking_app.db.engine).get_indexes('reserve_parking_spot') == indexes_before